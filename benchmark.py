@@ -0,0 +1,410 @@
+"""Bancs d'essai du pipeline audio, sans carte son ni interface graphique.
+
+Usage :
+    python benchmark.py codecs [--seconds 30] [--repeat 5] [--output resultats.json]
+    python benchmark.py stitch [--cases 200] [--output resultats.json]
+    python benchmark.py resample [--seconds 60] [--block-ms 10] [--output resultats.json]
+    python benchmark.py pipeline [--seconds 180] [--speed 20] [--input dictee.wav] [--output resultats.json]
+"""
+import sys
+import json
+import time
+import wave
+import argparse
+import difflib
+import platform
+import datetime
+import statistics
+import tracemalloc
+
+import numpy as np
+from PyQt5.QtCore import Qt
+
+from windows_recorder import (
+    CHUNK_ENCODERS, create_encoder, TranscriptStitcher, PolyphaseResampler,
+    RecorderThread, FakeTranscriptionBackend, PipelineMetrics
+)
+
+SAMPLERATE = 16000
+
+def synthetic_speech(seconds, samplerate=SAMPLERATE, seed=0):
+    """Signal int16 proche de la parole : syllabes voisées, pauses et bruit de fond."""
+    rng = np.random.default_rng(seed)
+    total = int(seconds * samplerate)
+    t = np.arange(total) / samplerate
+
+    # Fréquence fondamentale variable (voix entre 100 et 220 Hz)
+    f0 = 160 + 60 * np.sin(2 * np.pi * 0.3 * t) + 10 * rng.standard_normal(total).cumsum() / samplerate
+    phase = 2 * np.pi * np.cumsum(f0) / samplerate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+
+    # Enveloppe syllabique (~4 Hz) et pauses d'environ une seconde
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) ** 0.5
+    pauses = np.ones(total)
+    position = 0
+    while position < total:
+        position += int(rng.uniform(2.0, 6.0) * samplerate)
+        pause = int(rng.uniform(0.4, 1.5) * samplerate)
+        pauses[position:position + pause] = 0
+        position += pause
+
+    signal = 0.3 * voiced * envelope * pauses + 0.003 * rng.standard_normal(total)
+    return np.clip(signal * 32767, -32768, 32767).astype(np.int16)
+
+def bench_codecs(seconds=30, repeat=5):
+    """Octets et temps d'encodage par segment pour chaque codec disponible."""
+    audio = synthetic_speech(seconds)
+    segments = [memoryview(audio)]
+    results = {}
+    for codec in CHUNK_ENCODERS:
+        encoder = create_encoder(codec, SAMPLERATE)
+        if encoder.codec != codec:
+            results[codec] = {'available': False}
+            continue
+
+        timings = []
+        size = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            payload = encoder.encode(segments)
+            timings.append(time.perf_counter() - start)
+            size = len(payload)
+            del payload
+
+        encode_ms = statistics.median(timings) * 1000
+        results[codec] = {
+            'available': True,
+            'bytes_per_chunk': size,
+            'kbit_per_second': size * 8 / seconds / 1000,
+            'encode_ms_per_chunk': encode_ms,
+            'realtime_factor': encode_ms / 1000 / seconds,
+        }
+
+    wav_size = results['wav']['bytes_per_chunk']
+    for result in results.values():
+        if result['available']:
+            result['size_vs_wav'] = result['bytes_per_chunk'] / wav_size
+    return {'chunk_seconds': seconds, 'codecs': results}
+
+def print_codecs(report):
+    print(f"Segments de {report['chunk_seconds']} s")
+    print(f"{'codec':<6} {'octets':>10} {'kbit/s':>8} {'/wav':>6} {'encodage ms':>12}")
+    for codec, result in report['codecs'].items():
+        if not result['available']:
+            print(f"{codec:<6} {'indisponible':>10}")
+            continue
+        print(
+            f"{codec:<6} {result['bytes_per_chunk']:>10} {result['kbit_per_second']:>8.1f} "
+            f"{result['size_vs_wav']:>6.2f} {result['encode_ms_per_chunk']:>12.1f}"
+        )
+
+VOCABULARY = (
+    "le la les un une de des du et à en pour que qui dans sur avec par pas plus "
+    "patient examen résultat traitement dossier réunion projet client rapport "
+    "semaine demain contrôle analyse imagerie douleur tension suivi compte rendu "
+    "propose confirme observe prescrit reprend signale note valide"
+).split()
+
+def synthetic_overlaps(cases=200, seed=0):
+    """Corpus de transcriptions chevauchantes : (texte de référence, textes des segments)."""
+    rng = np.random.default_rng(seed)
+    corpus = []
+    for _ in range(cases):
+        words = [VOCABULARY[i] for i in rng.integers(0, len(VOCABULARY), int(rng.integers(30, 120)))]
+        chunks = []
+        position = 0
+        while position < len(words):
+            end = min(len(words), position + int(rng.integers(8, 25)))
+            overlap = int(rng.integers(2, 9)) if chunks else 0
+            chunk = list(words[max(0, position - overlap):end])
+            if overlap and rng.random() < 0.3:
+                chunk = chunk[1:]  # Premier mot du chevauchement perdu à la coupure
+            if overlap and chunk and rng.random() < 0.3:
+                chunk[0] = chunk[0][:max(1, len(chunk[0]) // 2)]  # Mot tronqué
+            if chunk and rng.random() < 0.5:
+                chunk[0] = chunk[0].capitalize()
+            if chunk and rng.random() < 0.3:
+                chunk[-1] += '.'
+            chunks.append(' '.join(chunk))
+            position = end
+        corpus.append((' '.join(words), chunks))
+    return corpus
+
+def bench_stitch(cases=200, seed=0):
+    """Exactitude (mots) et coût par segment du recollage des chevauchements."""
+    corpus = synthetic_overlaps(cases, seed)
+    normalize = TranscriptStitcher.normalize
+    scores = []
+    exact = 0
+    timings = []
+    for reference, chunks in corpus:
+        stitcher = TranscriptStitcher()
+        pieces = []
+        for chunk in chunks:
+            start = time.perf_counter()
+            pieces.append(stitcher.stitch(chunk))
+            timings.append(time.perf_counter() - start)
+        expected = [normalize(word) for word in reference.split()]
+        produced = [normalize(word) for word in ' '.join(pieces).split()]
+        scores.append(difflib.SequenceMatcher(None, expected, produced, autojunk=False).ratio())
+        exact += expected == produced
+    return {
+        'cases': cases,
+        'chunks': len(timings),
+        'word_accuracy': statistics.mean(scores),
+        'exact_cases': exact / cases,
+        'stitch_us_per_chunk': statistics.median(timings) * 1e6,
+        'stitch_us_max': max(timings) * 1e6,
+    }
+
+def print_stitch(report):
+    print(f"{report['cases']} transcriptions, {report['chunks']} segments chevauchants")
+    print(f"Exactitude (mots)     : {report['word_accuracy']:.3f}")
+    print(f"Textes exacts         : {report['exact_cases']:.1%}")
+    print(f"Coût par segment (µs) : {report['stitch_us_per_chunk']:.0f} (max {report['stitch_us_max']:.0f})")
+
+def tone_level_db(resampler, frequency, seconds=1.0):
+    """Niveau de sortie (dB) d'une sinusoïde d'entrée, relatif à l'entrée : gain ou réjection."""
+    rate = resampler.in_rate
+    t = np.arange(int(rate * seconds)) / rate
+    output = resampler.process((0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32))
+    resampler.reset()
+    settled = output[len(output) // 10:] / 32767
+    return 20 * np.log10(np.sqrt(np.mean(settled ** 2)) / (0.5 / np.sqrt(2)) + 1e-12)
+
+def bench_resample(seconds=60, block_ms=10, rates=(44100, 48000, 96000)):
+    """Coût CPU par seconde d'audio du rééchantillonnage vers 16 kHz, en blocs de callback."""
+    results = {}
+    for rate in rates:
+        resampler = PolyphaseResampler(rate, SAMPLERATE)
+        audio = synthetic_speech(seconds, rate).astype(np.float32) / 32768
+        block = int(rate * block_ms / 1000)
+        blocks = [audio[i:i + block] for i in range(0, len(audio), block)]
+
+        start = time.process_time()
+        for chunk in blocks:
+            resampler.process(chunk)
+        cpu = time.process_time() - start
+        resampler.reset()
+
+        results[str(rate)] = {
+            'ratio': f"{resampler.up}/{resampler.down}",
+            'taps': resampler.taps,
+            'cpu_ms_per_audio_second': cpu * 1000 / seconds,
+            'realtime_factor': cpu / seconds,
+            'us_per_block': cpu * 1e6 / len(blocks),
+            'passband_db_1khz': tone_level_db(resampler, 1000),
+            'alias_db_10khz': tone_level_db(resampler, 10000),
+        }
+    return {'seconds': seconds, 'block_ms': block_ms, 'rates': results}
+
+def print_resample(report):
+    print(f"{report['seconds']} s d'audio en blocs de {report['block_ms']} ms vers {SAMPLERATE} Hz")
+    print(f"{'entrée':>7} {'rapport':>8} {'ms CPU/s':>9} {'µs/bloc':>8} {'1 kHz dB':>9} {'repli dB':>9}")
+    for rate, result in report['rates'].items():
+        print(
+            f"{rate:>7} {result['ratio']:>8} {result['cpu_ms_per_audio_second']:>9.2f} "
+            f"{result['us_per_block']:>8.0f} {result['passband_db_1khz']:>9.2f} {result['alias_db_10khz']:>9.1f}"
+        )
+
+def load_pcm(path):
+    """Enregistrement WAV 16 bits (mono ou premier canal), ramené à 16 kHz."""
+    with wave.open(path, 'rb') as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path} : seul le PCM 16 bits est pris en charge")
+        rate = wav.getframerate()
+        channels = wav.getnchannels()
+        audio = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    audio = audio[::channels]
+    return PolyphaseResampler(rate, SAMPLERATE).process(audio.astype(np.float32) / 32768)
+
+def peak_rss_mb():
+    """Pic de mémoire résidente du processus (None si non disponible sur ce système)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+def drive_pipeline(audio, options, backend_params, speed, block_ms, trace_memory=False):
+    """Alimenter RecorderThread.on_audio comme le ferait le callback audio, plus vite que le temps réel."""
+    backend = FakeTranscriptionBackend(**backend_params)
+    metrics = PipelineMetrics()
+    backend.metrics = metrics
+    recorder = RecorderThread(backend, options, metrics=metrics)
+
+    # Collage instantané simulé : le texte est « collé » dès sa sortie du tampon de remise en ordre
+    paste = lambda text, chunk_number, *args: metrics.mark(recorder.session_id, chunk_number, 'pasted')
+    recorder.transcription_update.connect(paste, Qt.DirectConnection)
+    recorder.finished.connect(lambda text, upload_id, chunk_number: paste(text, chunk_number), Qt.DirectConnection)
+
+    block = int(SAMPLERATE * block_ms / 1000)
+    period = block / SAMPLERATE / speed if speed else 0
+    cpu = []
+    transient = []
+    retained = []
+    recorder.start_session()
+    start = time.perf_counter()
+    deadline = start
+    for position in range(0, len(audio), block):
+        chunk = audio[position:position + block]
+        if trace_memory:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        begin = time.thread_time()
+        recorder.on_audio(chunk)
+        cpu.append(time.thread_time() - begin)
+        if trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            transient.append(peak - before)
+            retained.append(current - before)
+        deadline += period
+        delay = deadline - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    capture_seconds = time.perf_counter() - start
+    recorder.request_stop()
+    recorder.finish_session()
+    elapsed = time.perf_counter() - start
+
+    stats = recorder.upload_pipeline.stats()
+    cpu = np.array(cpu) * 1e6
+    result = {
+        'callbacks': len(cpu),
+        'callback_cpu_us': {
+            'mean': float(cpu.mean()),
+            'p50': float(np.percentile(cpu, 50)),
+            'p99': float(np.percentile(cpu, 99)),
+            'max': float(cpu.max()),
+        },
+        'chunks': stats['processed'],
+        'chunks_per_second': stats['processed'] / elapsed,
+        'audio_seconds_per_second': len(audio) / SAMPLERATE / elapsed,
+        'capture_seconds': capture_seconds,
+        'drain_seconds': elapsed - capture_seconds,
+        'dropped_chunks': stats['dropped_chunks'],
+        'dropped_frames': stats['dropped_frames'] + recorder.ring_buffer.dropped_frames,
+        'backend_calls': backend.calls,
+        'backend_errors': backend.errors,
+        'latency_seconds': metrics.snapshot(),
+    }
+    if trace_memory:
+        transient = np.array(transient)
+        result['callback_alloc_bytes'] = {
+            'transient_p50': float(np.percentile(transient, 50)),
+            'transient_max': float(transient.max()),
+            'retained_total': float(np.sum(retained)),
+        }
+    return result
+
+def bench_pipeline(seconds=180, speed=20, block_ms=20, input_path=None, options=None, backend_params=None):
+    """Pipeline complet (découpage, compactage, encodage, envoi simulé, remise en ordre) sans carte son."""
+    audio = load_pcm(input_path) if input_path else synthetic_speech(seconds)
+    options = dict(options or {})
+    options.setdefault('spool_enabled', False)
+    backend_params = dict({'latency': 0.3, 'jitter': 0.1}, **(backend_params or {}))
+
+    timing = drive_pipeline(audio, options, backend_params, speed, block_ms)
+
+    tracemalloc.start()
+    memory = drive_pipeline(audio, options, backend_params, speed, block_ms, trace_memory=True)
+    traced_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    timing['callback_alloc_bytes'] = memory['callback_alloc_bytes']
+    timing['traced_peak_mb'] = traced_peak / 1024 / 1024
+    timing['peak_rss_mb'] = peak_rss_mb()
+    return {
+        'suite': 'pipeline',
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'input': input_path or f'synthetic:{seconds}s',
+        'audio_seconds': len(audio) / SAMPLERATE,
+        'speed': speed,
+        'block_ms': block_ms,
+        'options': options,
+        'backend': backend_params,
+        'results': timing,
+    }
+
+def print_pipeline(report):
+    results = report['results']
+    cpu = results['callback_cpu_us']
+    alloc = results['callback_alloc_bytes']
+    print(f"{report['input']} ({report['audio_seconds']:.0f} s) à x{report['speed']}, blocs de {report['block_ms']} ms")
+    print(f"Callback : {cpu['p50']:.0f} µs médiane, {cpu['p99']:.0f} µs p99, {cpu['max']:.0f} µs max CPU")
+    print(f"Allocations par callback : {alloc['transient_p50']:.0f} o médiane, {alloc['transient_max']:.0f} o max")
+    print(
+        f"Débit : {results['chunks']} segments, {results['audio_seconds_per_second']:.1f} s d'audio/s, "
+        f"{results['dropped_chunks']} segments abandonnés"
+    )
+    rss = results['peak_rss_mb']
+    print(f"Mémoire : pic tracé {results['traced_peak_mb']:.1f} Mo" + (f", RSS max {rss:.0f} Mo" if rss else ""))
+    print(f"{'étape':<13} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for stage, values in results['latency_seconds'].items():
+        print(
+            f"{stage:<13} {values['count']:>5} {values['p50'] * 1000:>8.1f} "
+            f"{values['p95'] * 1000:>8.1f} {values['p99'] * 1000:>8.1f}"
+        )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bancs d'essai du pipeline audio")
+    subparsers = parser.add_subparsers(dest='suite', required=True)
+
+    codecs_parser = subparsers.add_parser('codecs', help="taille et coût d'encodage par codec")
+    codecs_parser.add_argument('--seconds', type=float, default=30)
+    codecs_parser.add_argument('--repeat', type=int, default=5)
+    codecs_parser.add_argument('--output', help="fichier JSON de résultats")
+
+    stitch_parser = subparsers.add_parser('stitch', help="recollage des transcriptions chevauchantes")
+    stitch_parser.add_argument('--cases', type=int, default=200)
+    stitch_parser.add_argument('--seed', type=int, default=0)
+    stitch_parser.add_argument('--output', help="fichier JSON de résultats")
+
+    resample_parser = subparsers.add_parser('resample', help="coût du rééchantillonnage vers 16 kHz")
+    resample_parser.add_argument('--seconds', type=float, default=60)
+    resample_parser.add_argument('--block-ms', type=float, default=10)
+    resample_parser.add_argument('--output', help="fichier JSON de résultats")
+
+    pipeline_parser = subparsers.add_parser('pipeline', help="pipeline complet contre un backend simulé")
+    pipeline_parser.add_argument('--seconds', type=float, default=180, help="durée de l'audio synthétique")
+    pipeline_parser.add_argument('--input', help="enregistrement WAV 16 bits à utiliser à la place")
+    pipeline_parser.add_argument('--speed', type=float, default=20, help="multiple du temps réel (0 : sans pause)")
+    pipeline_parser.add_argument('--block-ms', type=float, default=20)
+    pipeline_parser.add_argument('--latency', type=float, default=0.3, help="latence du backend simulé (s)")
+    pipeline_parser.add_argument('--jitter', type=float, default=0.1)
+    pipeline_parser.add_argument('--error-rate', type=float, default=0.0)
+    pipeline_parser.add_argument('--codec', default='wav')
+    pipeline_parser.add_argument('--output', help="fichier JSON de résultats")
+
+    args = parser.parse_args(argv)
+    if args.suite == 'codecs':
+        report = bench_codecs(args.seconds, args.repeat)
+        print_codecs(report)
+    elif args.suite == 'stitch':
+        report = bench_stitch(args.cases, args.seed)
+        print_stitch(report)
+    elif args.suite == 'resample':
+        report = bench_resample(args.seconds, args.block_ms)
+        print_resample(report)
+    elif args.suite == 'pipeline':
+        report = bench_pipeline(
+            args.seconds,
+            args.speed,
+            args.block_ms,
+            input_path=args.input,
+            options={'codec': args.codec},
+            backend_params={'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate}
+        )
+        print_pipeline(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
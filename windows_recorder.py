@@ -2,23 +2,145 @@ import sys
 import os
 import json
 import time
-import keyboard
-import sounddevice as sd
-import requests
-import pyperclip
+STARTUP_STARTED = time.perf_counter()  # Origine du rapport de démarrage
+import importlib
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout,
     QLabel, QLineEdit, QPushButton, QSystemTrayIcon,
     QMenu, QMessageBox, QFrame, QHBoxLayout, QProgressBar,
     QDialog, QListWidget, QListWidgetItem, QComboBox, 
     QDialogButtonBox, QMenuBar, QAction, QFormLayout,
-    QScrollArea, QSizePolicy
+    QScrollArea, QSizePolicy, QListView
+)
+from PyQt5.QtCore import (
+    Qt, QObject, QThread, QTimer, pyqtSignal, QSize, QStandardPaths,
+    QAbstractListModel, QModelIndex, QCoreApplication
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize, QStandardPaths
 from PyQt5.QtGui import QIcon, QFont, QPalette, QColor, QPixmap, QPainter
-import numpy as np
 import wave
-import tempfile
+import threading
+import collections
+import io
+import uuid
+import random
+import struct
+import zlib
+import http.server
+import concurrent.futures
+import base64
+import bisect
+import email.utils
+import glob
+import argparse
+import functools
+
+class LazyModule:
+    """Module importé au premier accès à l'un de ses attributs."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+np = LazyModule('numpy')
+sd = LazyModule('sounddevice')
+requests = LazyModule('requests')
+urllib3 = LazyModule('urllib3')
+keyboard = LazyModule('keyboard')
+pyperclip = LazyModule('pyperclip')
+PRELOAD_MODULES = (np, requests, sd, pyperclip, keyboard)  # Ordre d'utilisation probable
+
+class StartupProfile:
+    """Chronologie du démarrage (ms), écrite dans startup_report.json."""
+    BUDGET_MS = 1000
+    EXPECTED = ('interactive', 'background_ready', 'modules_preloaded')
+
+    def __init__(self, started):
+        self.started = started
+        self.marks = {}
+        self.modules = {}
+        self.saved = False
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def mark(self, name):
+        with self._lock:
+            self.marks[name] = round(self.elapsed_ms(), 1)
+            complete = not self.saved and self.complete
+            if complete:
+                self.saved = True
+        if complete:
+            self.save()
+
+    def module_loaded(self, name, duration_ms, error=None):
+        with self._lock:
+            self.modules[name] = {'ms': round(duration_ms, 1), 'error': error}
+
+    @property
+    def complete(self):
+        return all(name in self.marks for name in self.EXPECTED)
+
+    @property
+    def within_budget(self):
+        return self.marks.get('interactive', float('inf')) <= self.BUDGET_MS
+
+    def report(self):
+        with self._lock:
+            return {
+                'budget_ms': self.BUDGET_MS,
+                'within_budget': self.within_budget,
+                'marks': dict(sorted(self.marks.items(), key=lambda item: item[1])),
+                'modules': dict(self.modules),
+                'python': sys.version.split()[0],
+                'platform': sys.platform,
+            }
+
+    def format(self):
+        report = self.report()
+        lines = ["Démarrage (ms depuis le lancement) :"]
+        lines += [f"  {name:<20} {ms:>8.1f}" for name, ms in report['marks'].items()]
+        lines.append("Préchargement des modules (ms) :")
+        for name, module in report['modules'].items():
+            status = f"  échec : {module['error']}" if module['error'] else ""
+            lines.append(f"  {name:<20} {module['ms']:>8.1f}{status}")
+        verdict = "respecté" if report['within_budget'] else "DÉPASSÉ"
+        lines.append(f"Budget {report['budget_ms']} ms jusqu'à l'icône : {verdict}")
+        return "\n".join(lines)
+
+    def save(self):
+        try:
+            with open(get_config_path('startup_report.json'), 'w') as f:
+                json.dump(self.report(), f, indent=2)
+        except Exception as e:
+            print(f"Impossible d'écrire le rapport de démarrage : {e}")
+
+STARTUP = StartupProfile(STARTUP_STARTED)
+
+def preload_modules(modules=PRELOAD_MODULES):
+    """Importer les modules lourds en arrière-plan, pendant que l'interface s'affiche."""
+    for module in modules:
+        started = time.perf_counter()
+        error = None
+        try:
+            module._load()
+        except Exception as e:
+            # L'erreur réapparaîtra à l'usage, là où elle est déjà gérée
+            error = str(e)
+            print(f"Préchargement de {module._name} impossible : {e}")
+        STARTUP.module_loaded(module._name, (time.perf_counter() - started) * 1000, error)
+    STARTUP.mark('modules_preloaded')
 
 # Fonctions auxiliaires pour gérer les chemins de configuration
 def get_config_directory():
@@ -32,6 +154,87 @@ def get_config_path(filename):
     """Retourne le chemin complet du fichier de configuration."""
     return os.path.join(get_config_directory(), filename)
 
+DEFAULT_BACKEND_URL = "https://backend.shaz.ai"
+
+def read_config():
+    """Contenu de config.json (identifiants, backend, options d'enregistrement), {} s'il est absent."""
+    config_path = get_config_path('config.json')
+    if not os.path.exists(config_path):
+        return {}
+    with open(config_path, 'r') as f:
+        return json.load(f)
+
+def get_data_directory(*subdirs):
+    """Retourne (en le créant) un répertoire de données locales de l'application."""
+    data_dir = os.path.join(QStandardPaths.writableLocation(QStandardPaths.AppLocalDataLocation), *subdirs)
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+    return data_dir
+
+def get_temp_directory():
+    """Retourne le répertoire temporaire propre à l'application (vidé au lancement)."""
+    return get_data_directory('tmp')
+
+# Options d'enregistrement par défaut (surchargées par la section 'recording' de config.json)
+DEFAULT_RECORDING_OPTIONS = {
+    'chunk_duration': 30,
+    'max_queued_chunks': 4,
+    'max_inflight_uploads': 2,  # Segments envoyés en parallèle dans une même session
+    'overflow_policy': 'drop_oldest',
+    'persist_chunks': False,
+    'spool_enabled': True,  # Journal disque des segments non acquittés, renvoyés automatiquement
+    'spool_max_mb': 512,
+    'session_store': False,  # Enregistrer chaque session complète dans un fichier projeté en mémoire
+    'session_store_max_sessions': 20,
+    'codec': 'wav',  # 'wav', 'flac' (sans perte) ou 'opus' (parole, bas débit)
+    'codec_params': {},
+    'chunking': 'vad',  # 'vad' (coupe sur les pauses) ou 'fixed' (coupe toutes les chunk_duration s)
+    'min_chunk_duration': 5,  # En mode 'vad', chunk_duration est la durée maximale
+    'min_pause_ms': 400,
+    'silence_threshold_db': -45,
+    'trim_silence': True,  # Raccourcir les longs silences avant l'envoi
+    'max_silence_ms': 700,
+    'silence_padding_ms': 150,
+    'overlap_seconds': 0,  # Audio précédent renvoyé en tête de chaque segment (0 : désactivé)
+    'warm_microphone': False,  # Garder le micro ouvert entre les dictées (démarrage instantané)
+    'preroll_ms': 500,  # Audio conservé avant le raccourci, micro ouvert uniquement
+    'input_samplerate': None,  # Fréquence d'ouverture du micro (None : fréquence native du périphérique)
+    'model': 'openai/whisper-large-v3-turbo',
+    'transcription_backend': 'http',  # 'http' ou 'fake' (backend local simulé, pour les essais hors ligne)
+    'fake_backend': {},  # Paramètres du backend simulé : latency, jitter, error_rate, seed
+    'metrics_file': None,  # Export des latences par étape : .json, sinon texte Prometheus
+    'metrics_port': None,  # Point d'accès local http://127.0.0.1:<port>/metrics (None : désactivé)
+}
+
+def validate_recording_options(options):
+    """Options d'enregistrement complétées ; une valeur invalide reprend sa valeur par défaut."""
+    choices = {
+        'overflow_policy': ('drop_oldest', 'drop_newest'),  # 'block' : mode batch uniquement
+        'codec': tuple(CHUNK_ENCODERS),
+        'chunking': ('vad', 'fixed'),
+        'transcription_backend': ('http', 'fake'),
+    }
+    positive = ('chunk_duration', 'max_queued_chunks', 'max_inflight_uploads', 'min_chunk_duration', 'spool_max_mb')
+    valid = dict(DEFAULT_RECORDING_OPTIONS)
+    for key, value in options.items():
+        default = DEFAULT_RECORDING_OPTIONS.get(key)
+        if key in choices:
+            ok = value in choices[key]
+        elif isinstance(default, bool):
+            ok = isinstance(value, bool)
+        elif isinstance(default, (int, float)):
+            ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+            ok = ok and (value > 0 if key in positive else value >= 0 or key == 'silence_threshold_db')
+        elif isinstance(default, dict):
+            ok = isinstance(value, dict)
+        else:
+            ok = True
+        if ok:
+            valid[key] = value
+        else:
+            print(f"Option d'enregistrement invalide {key} = {value!r} : valeur par défaut {default!r}")
+    return valid
+
 # Composants UI de base
 class ModernQLineEdit(QLineEdit):
     def __init__(self, placeholder="", parent=None):
@@ -143,320 +346,3081 @@ class SettingsDialog(QDialog):
         form_layout = QFormLayout()
         form_layout.setSpacing(10)
 
-        # Entrée de l'URL du backend
-        url_label = QLabel("URL du Backend :")
-        url_label.setStyleSheet("font-size: 14px; font-weight: bold;")
-        self.backend_input = ModernQLineEdit()
-        self.backend_input.setText(self.current_backend)
-        form_layout.addRow(url_label, self.backend_input)
+        # Entrée de l'URL du backend
+        url_label = QLabel("URL du Backend :")
+        url_label.setStyleSheet("font-size: 14px; font-weight: bold;")
+        self.backend_input = ModernQLineEdit()
+        self.backend_input.setText(self.current_backend)
+        form_layout.addRow(url_label, self.backend_input)
+
+        layout.addLayout(form_layout)
+
+        # Boutons
+        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        button_box.setStyleSheet("""
+            QPushButton {
+                min-width: 80px;
+                min-height: 30px;
+                border-radius: 5px;
+                font-size: 14px;
+            }
+            QPushButton[text="OK"] {
+                background-color: #4a90e2;
+                color: white;
+                border: none;
+            }
+            QPushButton[text="OK"]:hover {
+                background-color: #357abd;
+            }
+            QPushButton[text="Cancel"] {
+                background-color: #e0e0e0;
+                border: none;
+            }
+            QPushButton[text="Cancel"]:hover {
+                background-color: #cccccc;
+            }
+        """)
+        layout.addWidget(button_box)
+
+        self.setLayout(layout)
+
+    def get_backend_url(self):
+        return self.backend_input.text()
+
+class UserDirectory(QObject):
+    """Annuaire local des utilisateurs, indexé par ID et synchronisé par incréments."""
+    updated = pyqtSignal()
+    sync_failed = pyqtSignal(str)
+    CACHE_FILE = 'users_cache.json'
+
+    def __init__(self, backend_url=None, parent=None):
+        super().__init__(parent)
+        self.backend_url = backend_url
+        self.etag = None
+        self.synced_at = None
+        self._users = {}  # ID -> utilisateur
+        self._index = []  # (nom en minuscules, nom, ID), trié
+        self._lock = threading.Lock()
+        self._syncing = False
+        self.load()
+
+    def __len__(self):
+        return len(self._index)
+
+    def username(self, user_id, default=None):
+        user = self._users.get(user_id)
+        return user['username'] if user else default
+
+    def entries(self):
+        """Instantané de l'index trié : (nom en minuscules, nom, ID)."""
+        return self._index
+
+    @staticmethod
+    def prefix_range(entries, prefix):
+        """Bornes [début, fin) des entrées dont le nom commence par `prefix`."""
+        key = prefix.casefold()
+        start = bisect.bisect_left(entries, (key,))
+        end = bisect.bisect_left(entries, (key + '\U0010ffff',), lo=start)
+        return start, end
+
+    def _set_users(self, users):
+        index = sorted((user['username'].casefold(), user['username'], user_id) for user_id, user in users.items())
+        with self._lock:
+            self._users = users
+            self._index = index
+
+    def load(self):
+        try:
+            with open(get_config_path(self.CACHE_FILE), 'r') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return
+        if self.backend_url and cache.get('backend_url') != self.backend_url:
+            return
+        self.etag = cache.get('etag')
+        self.synced_at = cache.get('synced_at')
+        self._set_users({user['id']: user for user in cache.get('users', [])})
+
+    def save(self):
+        try:
+            with open(get_config_path(self.CACHE_FILE), 'w') as f:
+                json.dump({
+                    'backend_url': self.backend_url,
+                    'etag': self.etag,
+                    'synced_at': self.synced_at,
+                    'users': list(self._users.values()),
+                }, f)
+        except Exception as e:
+            print(f"Impossible d'enregistrer l'annuaire des utilisateurs : {e}")
+
+    def sync(self, client):
+        """Synchroniser en arrière-plan ; `updated` est émis si la liste a changé."""
+        if self._syncing:
+            return
+        self._syncing = True
+        threading.Thread(target=self._sync_worker, args=(client,), daemon=True).start()
+
+    def _sync_worker(self, client):
+        try:
+            if self.refresh(client):
+                self.updated.emit()
+        except Exception as e:
+            self.sync_failed.emit(str(e))
+        finally:
+            self._syncing = False
+
+    def refresh(self, client):
+        """Requête conditionnelle /users/. Retourne True si l'annuaire a changé."""
+        if client.base_url != self.backend_url:
+            # Autre backend : repartir d'un annuaire vide
+            self.backend_url = client.base_url
+            self.etag = None
+            self.synced_at = None
+            self._set_users({})
+        headers = {}
+        params = {}
+        if self._users:
+            if self.etag:
+                headers['If-None-Match'] = self.etag
+            if self.synced_at:
+                params['since'] = self.synced_at
+        response = client.get("/users/", endpoint='users', headers=headers, params=params)
+        if response.status_code == 304:
+            return False
+        if response.status_code != 200:
+            raise BackendError(f"Erreur de l'API : {response.status_code}", response.status_code)
+
+        payload = response.json()
+        users = {user['id']: user for user in payload.get('users', [])}
+        if 'since' in params:
+            # Réponse incrémentale : fusion, même sans liste `deleted`
+            merged = dict(self._users)
+            merged.update(users)
+            for user_id in payload.get('deleted') or []:
+                merged.pop(user_id, None)
+            users = merged
+        self._set_users(users)
+        self.etag = response.headers.get('ETag')
+        server_date = response.headers.get('Date')
+        if server_date:
+            # Horloge du serveur : pas d'écart avec l'horloge locale
+            self.synced_at = email.utils.parsedate_to_datetime(server_date).isoformat()
+        self.save()
+        return True
+
+class UserListModel(QAbstractListModel):
+    """Utilisateurs de l'annuaire filtrés par préfixe, chargés par lots au défilement."""
+    BATCH_SIZE = 200
+
+    def __init__(self, directory, parent=None):
+        super().__init__(parent)
+        self.directory = directory
+        self.prefix = ''
+        self._entries = []
+        self._start = 0
+        self._end = 0
+        self._loaded = 0
+        self.reload()
+        directory.updated.connect(self.reload)
+
+    def reload(self):
+        self.set_prefix(self.prefix)
+
+    def set_prefix(self, prefix):
+        self.beginResetModel()
+        self.prefix = prefix
+        self._entries = self.directory.entries()
+        self._start, self._end = UserDirectory.prefix_range(self._entries, prefix)
+        self._loaded = min(self.BATCH_SIZE, self._end - self._start)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < self._end - self._start
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(self.BATCH_SIZE, self._end - self._start - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        _, username, user_id = self._entries[self._start + index.row()]
+        if role == Qt.DisplayRole:
+            return username
+        if role == Qt.UserRole:
+            return user_id
+        return None
+
+class AutoShareDialog(QDialog):
+    def __init__(self, parent=None, directory=None, current_configs=None):
+        super().__init__(parent)
+        self.setWindowTitle("Configuration AutoShare")
+        self.setMinimumWidth(600)
+        self.setStyleSheet("""
+            QDialog {
+                background-color: #f5f6fa;
+            }
+            QListWidget, QListView {
+                border: 2px solid #e0e0e0;
+                border-radius: 8px;
+                padding: 5px;
+            }
+            QListWidget::item, QListView::item {
+                padding: 8px;
+                border-radius: 4px;
+            }
+            QListWidget::item:selected, QListView::item:selected {
+                background-color: #4a90e2;
+                color: white;
+            }
+            QComboBox {
+                padding: 8px;
+                border: 2px solid #e0e0e0;
+                border-radius: 8px;
+                min-height: 40px;
+            }
+        """)
+        
+        self.directory = directory if directory is not None else UserDirectory()
+        self.current_configs = current_configs if current_configs else []
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        layout.setSpacing(20)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        # Section de la liste des utilisateurs
+        user_frame = ModernQFrame()
+        user_layout = QVBoxLayout(user_frame)
+        user_layout.setSpacing(10)
+        
+        user_label = QLabel("Sélectionnez les utilisateurs pour AutoShare :")
+        user_label.setStyleSheet("font-size: 14px; font-weight: bold;")
+        user_layout.addWidget(user_label)
+
+        self.search_input = ModernQLineEdit("Rechercher un utilisateur...")
+        user_layout.addWidget(self.search_input)
+
+        # Modèle chargé par lots : seules les lignes visibles sont créées
+        self.user_model = UserListModel(self.directory, self)
+        self.user_list = QListView()
+        self.user_list.setModel(self.user_model)
+        self.user_list.setUniformItemSizes(True)
+        self.search_input.textChanged.connect(self.user_model.set_prefix)
+        user_layout.addWidget(self.user_list)
+        layout.addWidget(user_frame)
+
+        # Section du type d'accès
+        access_frame = ModernQFrame()
+        access_layout = QVBoxLayout(access_frame)
+        access_layout.setSpacing(10)
+
+        access_label = QLabel("Type d'accès :")
+        access_label.setStyleSheet("font-size: 14px; font-weight: bold;")
+        access_layout.addWidget(access_label)
+
+        self.access_type_combo = QComboBox()
+        self.access_type_combo.addItems(['viewer', 'editor'])
+        access_layout.addWidget(self.access_type_combo)
+        layout.addWidget(access_frame)
+
+        # Bouton pour ajouter une configuration
+        add_button = ModernQPushButton("Ajouter une Configuration", "#27ae60")
+        add_button.clicked.connect(self.add_config)
+        layout.addWidget(add_button)
+
+        # Section des configurations actuelles
+        config_frame = ModernQFrame()
+        config_layout = QVBoxLayout(config_frame)
+        config_layout.setSpacing(10)
+
+        config_label = QLabel("Configurations AutoShare Actuelles :")
+        config_label.setStyleSheet("font-size: 14px; font-weight: bold;")
+        config_layout.addWidget(config_label)
+
+        self.config_list = QListWidget()
+        self.refresh_config_list()
+        config_layout.addWidget(self.config_list)
+        layout.addWidget(config_frame)
+
+        # Bouton pour supprimer une configuration
+        remove_button = ModernQPushButton("Supprimer la Sélection", "#e74c3c")
+        remove_button.clicked.connect(self.remove_config)
+        layout.addWidget(remove_button)
+
+        # Boutons du dialogue
+        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+        self.setLayout(layout)
+
+    def refresh_config_list(self):
+        self.config_list.clear()
+        for config in self.current_configs:
+            username = self.directory.username(config['userId'], "Utilisateur Inconnu")
+            item_text = f"{username} - {config['accessType']}"
+            item = QListWidgetItem(item_text)
+            item.setData(Qt.UserRole, config['userId'])
+            self.config_list.addItem(item)
+
+    def add_config(self):
+        selected_indexes = self.user_list.selectionModel().selectedIndexes()
+        if not selected_indexes:
+            QMessageBox.warning(self, "Avertissement", "Veuillez sélectionner un utilisateur")
+            return
+
+        user_id = selected_indexes[0].data(Qt.UserRole)
+        access_type = self.access_type_combo.currentText()
+
+        if any(config['userId'] == user_id for config in self.current_configs):
+            QMessageBox.warning(self, "Avertissement", "Cet utilisateur a déjà une configuration")
+            return
+
+        self.current_configs.append({
+            'userId': user_id,
+            'accessType': access_type
+        })
+        self.refresh_config_list()
+
+    def remove_config(self):
+        selected_items = self.config_list.selectedItems()
+        if not selected_items:
+            QMessageBox.warning(self, "Avertissement", "Veuillez sélectionner une configuration à supprimer")
+            return
+
+        for item in selected_items:
+            user_id = item.data(Qt.UserRole)
+            self.current_configs = [config for config in self.current_configs if config['userId'] != user_id]
+        self.refresh_config_list()
+
+    def get_configs(self):
+        return self.current_configs
+
+class AudioRingBuffer:
+    """Tampon circulaire int16 préalloué pour l'audio capturé, découpé en segments sans copie."""
+    def __init__(self, capacity, dtype='int16'):
+        self.capacity = int(capacity)
+        self._buffer = self._allocate(self.capacity, dtype)
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)  # Signalée à chaque libération de segment
+        self._written = 0  # Fin des données écrites
+        self._sealed = 0  # Fin du dernier segment scellé
+        self._floor = 0  # Plus ancien échantillon encore référencé
+        self._outstanding = {}  # Début -> fin des segments non libérés
+        self.retain = 0  # Échantillons de chevauchement entre segments consécutifs
+        self.dropped_frames = 0
+
+    def _allocate(self, capacity, dtype):
+        return np.zeros(capacity, dtype=dtype)
+
+    @property
+    def pending(self):
+        """Échantillons écrits mais pas encore scellés."""
+        return self._written - self._sealed
+
+    def write(self, block):
+        """Copier un bloc dans le tampon. Retourne le nombre d'échantillons écrits."""
+        frames = len(block)
+        with self._lock:
+            free = self.capacity - (self._written - self._floor)
+        if frames > free:
+            self.dropped_frames += frames - free
+            frames = free
+        if frames <= 0:
+            return 0
+
+        position = self._written % self.capacity
+        first = min(frames, self.capacity - position)
+        self._buffer[position:position + first] = block[:first]
+        if first < frames:
+            self._buffer[:frames - first] = block[first:frames]
+        self._written += frames
+        return frames
+
+    def seal(self, frames=None, is_final=False):
+        """Sceller les `frames` prochains échantillons (tous par défaut) en un segment."""
+        with self._lock:
+            sealed = self._sealed
+            end = self._written if frames is None else min(sealed + frames, self._written)
+            if end <= sealed and not (is_final and sealed):
+                # Rien à sceller ; sauf le segment final d'une session déjà entamée, même vide
+                return None
+            start = max(0, sealed - self.retain)
+            self._sealed = end
+            self._outstanding[start] = end
+        return AudioChunk(self, start, end, is_final, overlap=sealed - start)
+
+    def segments(self, start, end):
+        """Vues numpy sur une zone : une seule, ou deux si elle chevauche la fin du tampon."""
+        position = start % self.capacity
+        frames = end - start
+        first = min(frames, self.capacity - position)
+        views = [self._buffer[position:position + first]]
+        if first < frames:
+            views.append(self._buffer[:frames - first])
+        return views
+
+    def release(self, start):
+        with self._lock:
+            self._outstanding.pop(start, None)
+            self._floor = max(0, min([self._sealed - self.retain, *self._outstanding]))
+            self._space.notify_all()
+
+    def wait_for_space(self, frames):
+        """Attendre que `frames` échantillons puissent être écrits sans perte (lecture de fichiers)."""
+        with self._space:
+            self._space.wait_for(lambda: self.capacity - (self._written - self._floor) >= frames)
+
+class VadSegmenter:
+    """Détection des pauses pour aligner les coupures de segments sur le silence."""
+    def __init__(self, samplerate=16000, min_seconds=5, max_seconds=30, min_pause_ms=400,
+                 threshold_db=-45, frame_ms=20, search_seconds=2, noise_seconds=2.0):
+        self.frame = samplerate * frame_ms // 1000
+        self.min_frames = max(1, int(min_seconds * 1000 / frame_ms))
+        self.max_frames = max(self.min_frames, int(max_seconds * 1000 / frame_ms))
+        self.pause_frames = max(1, int(np.ceil(min_pause_ms / frame_ms)))
+        self.search_frames = max(1, int(search_seconds * 1000 / frame_ms))
+        self.threshold = 32768.0 * 10 ** (threshold_db / 20)
+        self.noise_floor = self.threshold
+        # Remontée du bruit de fond par trame silencieuse (constante de temps indépendante des blocs)
+        self.noise_rise = 1.0 - np.exp(-frame_ms / (noise_seconds * 1000))
+        self._energies = np.zeros(self.max_frames, dtype=np.float32)  # RMS des trames du segment courant
+        self._count = 0  # Trames complètes dans le segment courant
+        self._silent_run = 0  # Trames silencieuses consécutives en fin de segment
+        self._remainder = np.zeros(self.frame, dtype=np.int16)
+        self._remainder_len = 0
+
+    def frame_energies(self, samples):
+        """RMS de chaque trame complète de `samples` (le reste est ignoré)."""
+        count = len(samples) // self.frame
+        frames = samples[:count * self.frame].reshape(count, self.frame)
+        return np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+
+    def feed(self, block):
+        """Analyser un bloc. Retourne la longueur en échantillons du segment à sceller, ou None."""
+        energies = self._consume(block)
+        if energies.size == 0:
+            return None
+
+        # Seuil adaptatif : suit le bruit de fond, jamais sous le seuil absolu
+        threshold = max(self.threshold, self.noise_floor * 2.0)
+        self._track_noise(energies[energies <= threshold])
+
+        # Longueur de la plage silencieuse se terminant à chaque trame
+        index = np.arange(energies.size)
+        last_speech = np.maximum.accumulate(np.where(energies > threshold, index, -1))
+        runs = index - last_speech
+        runs[last_speech < 0] += self._silent_run
+
+        positions = self._count + index + 1  # Taille du segment après chaque trame
+        cut_index = None
+        pauses = np.flatnonzero(
+            (positions >= self.min_frames) & (positions <= self.max_frames) & (runs >= self.pause_frames)
+        )
+        if pauses.size:
+            cut_index = int(pauses[0])
+        elif positions[-1] >= self.max_frames:
+            # Coupure forcée sur la trame la plus calme précédant la durée maximale
+            self._store(energies[:self.max_frames - self._count])
+            window_start = max(0, self.max_frames - self.search_frames)
+            cut_frames = window_start + int(np.argmin(self._energies[window_start:self.max_frames])) + 1
+            carried = np.concatenate((self._energies[cut_frames:self.max_frames],
+                                      energies[self.max_frames - self._count:]))
+            return self._start_segment(cut_frames, carried, int(runs[-1]))
+
+        if cut_index is None:
+            self._store(energies)
+            self._silent_run = int(runs[-1])
+            return None
+        cut_frames = self._count + cut_index + 1
+        return self._start_segment(cut_frames, energies[cut_index + 1:], int(runs[-1]))
+
+    def _track_noise(self, silent):
+        """Mettre à jour le bruit de fond à partir des seules trames silencieuses : baisse immédiate, remontée lente."""
+        if silent.size == 0:
+            return
+        self.noise_floor = min(self.noise_floor, float(silent.min()))
+        rise = 1.0 - (1.0 - self.noise_rise) ** silent.size
+        self.noise_floor += rise * (float(silent.mean()) - self.noise_floor)
+
+    def reset(self):
+        self._count = 0
+        self._silent_run = 0
+        self._remainder_len = 0
+
+    def _consume(self, block):
+        """Énergies des trames complétées par ce bloc, en reprenant le reste du bloc précédent."""
+        energies = []
+        if self._remainder_len:
+            needed = self.frame - self._remainder_len
+            head = block[:needed]
+            self._remainder[self._remainder_len:self._remainder_len + len(head)] = head
+            self._remainder_len += len(head)
+            block = block[len(head):]
+            if self._remainder_len < self.frame:
+                return np.zeros(0, dtype=np.float32)
+            energies.append(self.frame_energies(self._remainder))
+            self._remainder_len = 0
+
+        energies.append(self.frame_energies(block))
+        tail = len(block) % self.frame
+        if tail:
+            self._remainder[:tail] = block[len(block) - tail:]
+            self._remainder_len = tail
+        return energies[0] if len(energies) == 1 else np.concatenate(energies)
+
+    def _store(self, energies):
+        count = min(len(energies), self.max_frames - self._count)
+        self._energies[self._count:self._count + count] = energies[:count]
+        self._count += count
+
+    def _start_segment(self, cut_frames, carried, trailing_run):
+        """Démarrer le segment suivant avec les trames postérieures à la coupure."""
+        self._count = 0
+        self._store(carried)
+        self._silent_run = min(trailing_run, self._count)
+        return cut_frames * self.frame
+
+class SilenceTrimmer:
+    """Compactage des longues plages de silence d'un segment avant encodage."""
+    def __init__(self, samplerate=16000, max_gap_ms=700, padding_ms=150, threshold_db=-45, frame_ms=20):
+        self.frame = samplerate * frame_ms // 1000
+        self.padding_frames = max(0, int(padding_ms / frame_ms))
+        self.gap_frames = max(2 * self.padding_frames + 1, int(max_gap_ms / frame_ms))
+        self.threshold = 32768.0 * 10 ** (threshold_db / 20)
+
+    def compact(self, arrays):
+        """Retourne (segments conservés, nombre d'échantillons retirés)."""
+        if not arrays:
+            return [], 0
+        samples = arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+        count = len(samples) // self.frame
+        if count == 0:
+            return [samples], 0
+
+        frames = samples[:count * self.frame].reshape(count, self.frame)
+        silent = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1)) <= self.threshold
+
+        # Bornes [début, fin[ des plages silencieuses, en trames
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], silent.view(np.int8), [0]))))
+        starts, ends = edges[0::2], edges[1::2]
+        long_runs = (ends - starts) >= self.gap_frames
+
+        kept = []
+        removed = 0
+        position = 0
+        for start, end in zip(starts[long_runs], ends[long_runs]):
+            cut_start = (start + self.padding_frames) * self.frame
+            cut_end = (end - self.padding_frames) * self.frame
+            kept.append(samples[position:cut_start])
+            removed += cut_end - cut_start
+            position = cut_end
+        kept.append(samples[position:])
+        return [segment for segment in kept if len(segment)], int(removed)
+
+class LevelMeter:
+    """Niveau audio calculé dans le callback, lu par l'interface à cadence fixe."""
+    UI_RATE_HZ = 25
+
+    def __init__(self, decimation=4, decay=0.9):
+        self.decimation = decimation  # Un échantillon sur N suffit pour un vumètre
+        self.decay = decay
+        self.peak = 0.0
+        self.rms = 0.0
+
+    def update(self, block):
+        if len(block) == 0:
+            return
+        samples = block[::self.decimation]
+        peak = max(int(samples.max()), -int(samples.min())) / 32768.0
+        self.rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float32)))) / 32768.0
+        self.peak = max(peak, self.peak * self.decay)
+
+    def reset(self):
+        self.peak = 0.0
+        self.rms = 0.0
+
+class MappedSessionBuffer(AudioRingBuffer):
+    """Tampon de capture écrit dans des fichiers projetés en mémoire (session complète)."""
+    def __init__(self, directory, session_id, samplerate=16000, part_seconds=300):
+        self.directory = directory
+        self.session_id = session_id
+        self.samplerate = samplerate
+        self.part_samples = int(part_seconds * samplerate)
+        self._parts = []
+        super().__init__(self.part_samples)
+
+    def part_path(self, index):
+        return os.path.join(self.directory, f"{self.session_id}.{index}.pcm")
+
+    def _allocate(self, capacity, dtype):
+        self._dtype = dtype
+        return self._add_part()
+
+    def _add_part(self):
+        part = np.memmap(self.part_path(len(self._parts)), dtype=self._dtype, mode='w+', shape=(self.part_samples,))
+        self._parts.append(part)
+        return part
+
+    def write(self, block):
+        frames = len(block)
+        offset = 0
+        while offset < frames:
+            index, position = divmod(self._written, self.part_samples)
+            if index >= len(self._parts):
+                self._add_part()
+            count = min(frames - offset, self.part_samples - position)
+            self._parts[index][position:position + count] = block[offset:offset + count]
+            offset += count
+            self._written += count
+        return frames
+
+    def wait_for_space(self, frames):
+        pass  # Nouvelles parties à la demande : jamais plein
+
+    def segments(self, start, end):
+        views = []
+        while start < end:
+            index, position = divmod(start, self.part_samples)
+            count = min(end - start, self.part_samples - position)
+            views.append(self._parts[index][position:position + count])
+            start += count
+        return views
+
+    def close(self):
+        """Vider les projections sur disque et décrire l'enregistrement pour une relecture ultérieure."""
+        for part in self._parts:
+            part.flush()
+        count = len(self._parts)
+        # Fermer les projections avant de tronquer la dernière partie (refusé par Windows sinon)
+        self._parts = []
+        self._buffer = None
+        used = self._written - (count - 1) * self.part_samples
+        try:
+            os.truncate(self.part_path(count - 1), used * np.dtype(self._dtype).itemsize)
+        except OSError as e:
+            print(f"Impossible de réduire {self.part_path(count - 1)} : {e}")
+        meta = {
+            'session_id': self.session_id,
+            'samplerate': self.samplerate,
+            'samples': self._written,
+            'part_samples': self.part_samples,
+            'parts': [os.path.basename(self.part_path(index)) for index in range(count)],
+        }
+        with open(os.path.join(self.directory, f"{self.session_id}.json"), 'w') as f:
+            json.dump(meta, f, indent=4)
+
+class SessionAudioStore:
+    """Répertoire des enregistrements complets de sessions (fichiers PCM projetés en mémoire)."""
+    def __init__(self, directory, max_sessions=20, part_seconds=300):
+        self.directory = directory
+        self.max_sessions = max_sessions
+        self.part_seconds = part_seconds
+        self._created = set()  # Sessions de ce lancement (les autres sans .json sont orphelines)
+
+    def create(self, session_id, samplerate=16000):
+        self.enforce_retention(keep=self.max_sessions - 1)
+        self._created.add(session_id)
+        return MappedSessionBuffer(self.directory, session_id, samplerate, self.part_seconds)
+
+    def list_sessions(self):
+        """Sessions terminées, de la plus ancienne à la plus récente."""
+        sessions = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                sessions.append((entry.stat().st_mtime, entry.name[:-len('.json')]))
+        return [session_id for _, session_id in sorted(sessions)]
+
+    def open_recording(self, session_id):
+        """Relire une session sans copie : (fréquence, liste de vues int16 en lecture seule)."""
+        with open(os.path.join(self.directory, f"{session_id}.json"), 'r') as f:
+            meta = json.load(f)
+        views = []
+        remaining = meta['samples']
+        for name in meta['parts']:
+            if remaining <= 0:
+                break
+            part = np.memmap(os.path.join(self.directory, name), dtype=np.int16, mode='r')
+            views.append(part[:min(remaining, len(part))])
+            remaining -= len(views[-1])
+        return meta['samplerate'], views
+
+    def delete(self, session_id):
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(f"{session_id}."):
+                try:
+                    os.remove(entry.path)
+                except OSError as e:
+                    print(f"Impossible de supprimer {entry.path} : {e}")
+
+    def orphaned_sessions(self):
+        """Sessions interrompues lors d'un lancement précédent : parties .pcm sans .json."""
+        names = [entry.name for entry in os.scandir(self.directory)]
+        finished = {name[:-len('.json')] for name in names if name.endswith('.json')}
+        return {
+            name.split('.')[0] for name in names
+            if name.endswith('.pcm') and name.split('.')[0] not in finished | self._created
+        }
+
+    def enforce_retention(self, keep=None):
+        keep = self.max_sessions if keep is None else keep
+        for session_id in self.orphaned_sessions():
+            self.delete(session_id)
+        sessions = self.list_sessions()
+        for session_id in sessions[:max(0, len(sessions) - keep)]:
+            self.delete(session_id)
+
+class AudioChunk:
+    """Segment audio scellé : vue sans copie sur une zone du tampon de capture."""
+    __slots__ = ('buffer', 'start', 'end', 'is_final', 'overlap', 'sealed_at', '_released')
+
+    def __init__(self, buffer, start, end, is_final=False, overlap=0):
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+        self.is_final = is_final
+        self.overlap = overlap  # Échantillons de tête déjà présents dans le segment précédent
+        self.sealed_at = time.monotonic()
+        self._released = False
+
+    @property
+    def frames(self):
+        return self.end - self.start
+
+    def arrays(self):
+        """Vues numpy sur les échantillons du segment (valides jusqu'à `release`)."""
+        if self._released:
+            raise RuntimeError("Segment audio déjà libéré")
+        return self.buffer.segments(self.start, self.end)
+
+    def memoryviews(self):
+        return [memoryview(array) for array in self.arrays()]
+
+    def release(self):
+        """Rendre la zone au tampon une fois l'encodage terminé."""
+        if not self._released:
+            self._released = True
+            self.buffer.release(self.start)
+
+class LatencyHistogram:
+    """Histogramme de latences log-linéaire, dans l'esprit de HdrHistogram."""
+    SUB_BITS = 6
+    HALF = 1 << (SUB_BITS - 1)
+
+    def __init__(self):
+        self._counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @classmethod
+    def index(cls, micros):
+        if micros < 2 * cls.HALF:
+            return micros
+        shift = micros.bit_length() - cls.SUB_BITS
+        return (shift << (cls.SUB_BITS - 1)) + (micros >> shift)
+
+    @classmethod
+    def value(cls, index):
+        """Milieu de la classe, en microsecondes."""
+        if index < 2 * cls.HALF:
+            return index
+        shift = index // cls.HALF - 1
+        mantissa = index - shift * cls.HALF
+        return ((mantissa << shift) + ((mantissa + 1) << shift) - 1) / 2
+
+    def record(self, seconds):
+        micros = max(0, int(seconds * 1e6))
+        index = self.index(micros)
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """Centile `q` (0-100) en secondes."""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(np.ceil(q / 100 * self.count)))
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= rank:
+                return min(self.value(index) / 1e6, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+class PipelineMetrics:
+    """Latences par étape de chaque segment, de son scellé jusqu'au collage du texte."""
+    STAGES = (
+        ('queue', 'sealed', 'encode_start'),
+        ('encode', 'encode_start', 'encoded'),
+        ('upload', 'upload_start', 'body_sent'),
+        ('server', 'body_sent', 'response'),
+        ('reorder_wait', 'response', 'released'),
+        ('paste', 'released', 'pasted'),
+        ('end_to_end', 'sealed', 'pasted'),
+    )
+    MAX_TRACKED = 256  # Segments dont le texte vide ne sera jamais collé : oubliés au-delà
+
+    def __init__(self, export_path=None):
+        self.export_path = export_path
+        self.histograms = collections.OrderedDict(
+            (name, LatencyHistogram()) for name, _, _ in self.STAGES + (('stop_to_text', None, None),)
+        )
+        self._chunks = collections.OrderedDict()  # (session, segment) -> {événement: instant}
+        self._lock = threading.Lock()
+
+    def mark(self, session_id, chunk_number, event, at=None):
+        at = time.monotonic() if at is None else at
+        key = (session_id, chunk_number)
+        with self._lock:
+            events = self._chunks.get(key)
+            if events is None:
+                events = self._chunks[key] = {}
+                if len(self._chunks) > self.MAX_TRACKED:
+                    self._chunks.popitem(last=False)
+            events[event] = at
+            for name, start, end in self.STAGES:
+                if end == event and start in events:
+                    self.histograms[name].record(at - events[start])
+            if event == 'pasted':
+                del self._chunks[key]
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.histograms[stage].record(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: histogram.snapshot() for name, histogram in self.histograms.items()}
+
+    def to_json(self):
+        return json.dumps({'unit': 'seconds', 'stages': self.snapshot()}, indent=4)
+
+    def to_prometheus(self):
+        lines = [
+            '# HELP dictee_stage_latency_seconds Latence par étape du pipeline de dictée',
+            '# TYPE dictee_stage_latency_seconds summary',
+        ]
+        for stage, values in self.snapshot().items():
+            for key, quantile in (('p50', '0.5'), ('p95', '0.95'), ('p99', '0.99')):
+                lines.append(
+                    f'dictee_stage_latency_seconds{{stage="{stage}",quantile="{quantile}"}} {values[key]:.6f}'
+                )
+            lines.append(f'dictee_stage_latency_seconds_sum{{stage="{stage}"}} {values["mean"] * values["count"]:.6f}')
+            lines.append(f'dictee_stage_latency_seconds_count{{stage="{stage}"}} {values["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def flush(self):
+        """Écrire l'export dans `export_path` (JSON si l'extension est .json)."""
+        if not self.export_path:
+            return
+        try:
+            content = self.to_json() if self.export_path.endswith('.json') else self.to_prometheus()
+            with open(self.export_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        except Exception as e:
+            print(f"Impossible d'exporter les mesures de latence : {e}")
+
+class MetricsServer:
+    """Point d'accès local en lecture seule : /metrics (Prometheus) et /metrics.json."""
+    def __init__(self, metrics, port, host='127.0.0.1'):
+        metrics_ref = metrics
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body, content_type = metrics_ref.to_prometheus(), 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    body, content_type = metrics_ref.to_json(), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name='metrics', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class UploadPipeline:
+    """File bornée entre le callback audio et les workers d'envoi."""
+    OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+    def __init__(self, handler, max_queued=4, workers=1, overflow_policy='drop_oldest',
+                 on_drop=None, name="upload"):
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Politique de débordement inconnue : {overflow_policy}")
+        self.handler = handler
+        self.max_queued = max(1, int(max_queued))
+        self.workers = max(1, int(workers))
+        self.overflow_policy = overflow_policy
+        self.on_drop = on_drop
+        self.name = name
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._closed = False
+        self._next_seq = 0
+
+        # Compteurs exposés pour le diagnostic
+        self.submitted = 0
+        self.processed = 0
+        self.max_depth = 0
+        self.dropped_chunks = 0
+        self.dropped_frames = 0
+
+    @property
+    def depth(self):
+        """Nombre de segments en attente dans la file."""
+        return len(self._queue)
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"{self.name}-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, item, frames=0, block=None):
+        """Déposer un segment scellé. Retourne False si le segment a été abandonné."""
+        if block is None:
+            block = self.overflow_policy == 'block'
+        dropped = []
+        accepted = True
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Le pipeline d'envoi est fermé")
+            while len(self._queue) >= self.max_queued:
+                if block:
+                    self._cond.wait()
+                elif self.overflow_policy == 'drop_oldest':
+                    dropped.append(self._queue.popleft())
+                else:
+                    dropped.append((item, frames))
+                    accepted = False
+                    break
+            if accepted:
+                self._queue.append((item, frames))
+                self.submitted += 1
+                self.max_depth = max(self.max_depth, len(self._queue))
+                self._cond.notify_all()
+            for _, dropped_frames in dropped:
+                self.dropped_chunks += 1
+                self.dropped_frames += dropped_frames
+
+        if self.on_drop:
+            for dropped_item, _ in dropped:
+                self.on_drop(dropped_item)
+        return accepted
+
+    def close(self, wait=True):
+        """Refuser tout nouveau segment et laisser les workers vider la file."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def stats(self):
+        return {
+            'submitted': self.submitted,
+            'processed': self.processed,
+            'queue_depth': self.depth,
+            'max_queue_depth': self.max_depth,
+            'dropped_chunks': self.dropped_chunks,
+            'dropped_frames': self.dropped_frames,
+        }
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                item, _ = self._queue.popleft()
+                # Numéro de séquence attribué dans l'ordre de sortie de la file
+                seq = self._next_seq
+                self._next_seq += 1
+                self._cond.notify_all()
+
+            try:
+                self.handler(item, seq)
+            except Exception as e:
+                print(f"Erreur dans le worker {threading.current_thread().name} : {e}")
+            finally:
+                with self._cond:
+                    self.processed += 1
+
+def load_soundfile():
+    """Import différé de soundfile, dépendance optionnelle des codecs FLAC et Opus."""
+    try:
+        import soundfile
+    except (ImportError, OSError):
+        return None
+    return soundfile
+
+class WavEncoder:
+    """Encodeur WAV PCM 16 bits mono vers un tampon mémoire réutilisable."""
+    codec = 'wav'
+    extension = 'wav'
+    content_type = 'audio/wav'
+
+    def __init__(self, samplerate=16000):
+        self.samplerate = samplerate
+        self._buffer = io.BytesIO()
+        self._view = None
+
+    @property
+    def params(self):
+        """Paramètres du codec transmis au backend avec chaque segment."""
+        return {}
+
+    def form_fields(self):
+        """Champs de formulaire décrivant l'encodage, pour que le backend sache décoder."""
+        return {
+            'codec': self.codec,
+            'codec_params': json.dumps(self.params),
+            'sample_rate': self.samplerate,
+        }
+
+    def encode(self, segments):
+        """Encoder une suite de segments PCM int16 (memoryviews ou tableaux)."""
+        self._reset()
+        self._write(segments)
+        self._view = self._buffer.getbuffer()
+        return self._view
+
+    def _write(self, segments):
+        with wave.open(self._buffer, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(self.samplerate)
+            for segment in segments:
+                wav_file.writeframes(segment)
+
+    def _reset(self):
+        if self._view is not None:
+            try:
+                self._view.release()
+            except BufferError:
+                pass
+            self._view = None
+        try:
+            self._buffer.seek(0)
+            self._buffer.truncate()
+        except BufferError:
+            # Une vue précédente est encore référencée ailleurs : nouveau tampon
+            self._buffer = io.BytesIO()
+
+class SoundFileEncoder(WavEncoder):
+    """Base des encodeurs compressés reposant sur libsndfile (module soundfile)."""
+    format = None
+    subtype = None
+
+    def __init__(self, samplerate=16000, compression_level=None):
+        super().__init__(samplerate)
+        self.compression_level = compression_level
+        self._soundfile = load_soundfile()
+        if self._soundfile is None:
+            raise RuntimeError(f"Le codec {self.codec} nécessite le module soundfile")
+
+    @property
+    def params(self):
+        if self.compression_level is None:
+            return {}
+        return {'compression_level': self.compression_level}
+
+    def _write(self, segments):
+        options = {}
+        if self.compression_level is not None:
+            options['compression_level'] = self.compression_level
+        with self._soundfile.SoundFile(
+            self._buffer, 'w', self.samplerate, 1,
+            format=self.format, subtype=self.subtype, **options
+        ) as sound_file:
+            for segment in segments:
+                sound_file.write(np.frombuffer(segment, dtype=np.int16))
+
+class FlacEncoder(SoundFileEncoder):
+    """FLAC sans perte : environ 40 à 60 % de la taille du WAV pour la parole."""
+    codec = 'flac'
+    extension = 'flac'
+    content_type = 'audio/flac'
+    format = 'FLAC'
+    subtype = 'PCM_16'
+
+class OpusEncoder(SoundFileEncoder):
+    """Opus dans un conteneur Ogg : codec parole bas débit (environ 24 kbit/s par défaut)."""
+    codec = 'opus'
+    extension = 'ogg'
+    content_type = 'audio/ogg'
+    format = 'OGG'
+    subtype = 'OPUS'
+
+CHUNK_ENCODERS = {
+    'wav': WavEncoder,
+    'flac': FlacEncoder,
+    'opus': OpusEncoder,
+}
+
+def create_encoder(codec='wav', samplerate=16000, params=None):
+    """Instancier l'encodeur demandé, avec repli sur WAV s'il n'est pas disponible."""
+    encoder_class = CHUNK_ENCODERS.get(codec)
+    if encoder_class is None:
+        raise ValueError(f"Codec inconnu : {codec}")
+    try:
+        return encoder_class(samplerate, **(params or {}))
+    except RuntimeError as e:
+        print(f"{e} : repli sur WAV")
+        return WavEncoder(samplerate)
+
+class MultipartBody:
+    """Corps multipart/form-data lu par morceaux directement depuis la mémoire."""
+    def __init__(self, fields, file_field, filename, payload, content_type):
+        self.boundary = uuid.uuid4().hex
+        head = ''.join(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+            for name, value in fields.items()
+        )
+        head += (
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+            f'filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n'
+        )
+        tail = f'\r\n--{self.boundary}--\r\n'
+        self._parts = [head.encode('utf-8'), memoryview(payload).cast('B'), tail.encode('utf-8')]
+        self._length = sum(len(part) for part in self._parts)
+        self._position = 0
+        self.sent_at = None  # Lecture du dernier octet par requests (time.monotonic)
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        while True:
+            block = self.read(64 * 1024)
+            if not block:
+                return
+            yield block
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=0):
+        """Permet de rejouer le corps (nouvelle tentative d'envoi)."""
+        if whence == 1:
+            offset += self._position
+        elif whence == 2:
+            offset += self._length
+        self._position = max(0, min(offset, self._length))
+        return self._position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._length - self._position
+        out = []
+        remaining = size
+        offset = 0
+        for part in self._parts:
+            if remaining <= 0:
+                break
+            part_end = offset + len(part)
+            if self._position < part_end:
+                start = self._position - offset
+                piece = part[start:start + remaining]
+                out.append(bytes(piece))
+                self._position += len(piece)
+                remaining -= len(piece)
+            offset = part_end
+        if out and self._position >= self._length:
+            self.sent_at = time.monotonic()
+        return b''.join(out)
+
+TRANSCRIPTION_MODEL = 'openai/whisper-large-v3-turbo'
+
+def chunk_upload_meta(encoder):
+    """Description d'un segment encodé nécessaire à son envoi (conservée telle quelle dans le spool)."""
+    return {
+        'fields': encoder.form_fields(),
+        'filename': f'chunk.{encoder.extension}',
+        'content_type': encoder.content_type,
+    }
+
+class ChunkSpool:
+    """Journal disque des segments encodés en attente d'acquittement."""
+    MAGIC = b'DVSP'
+    HEADER = struct.Struct('<4sBBIHII')  # Magique, type, drapeaux, numéro, taille méta, taille contenu, CRC32
+    RECORD_CHUNK = 1
+    RECORD_ACK = 2
+    FLAG_FINAL = 0x01
+    EXTENSION = '.spool'
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, fsync_every=8, fsync_interval=1.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.evicted_sessions = 0
+        self._lock = threading.RLock()
+        self._handles = {}  # session_id -> [fichier, enregistrements non synchronisés]
+        self._sync_wake = threading.Event()
+        self._syncer = None
+
+    def path(self, session_id):
+        return os.path.join(self.directory, f"{session_id}{self.EXTENSION}")
+
+    def open_session(self, session_id):
+        with self._lock:
+            if session_id not in self._handles:
+                # Un ajout derrière une fin tronquée serait illisible à la relecture
+                self.repair(session_id)
+                self._handles[session_id] = [open(self.path(session_id), 'ab'), 0]
+
+    def repair(self, session_id):
+        """Tronquer le journal après le dernier enregistrement intact (fin tronquée par un arrêt brutal)."""
+        path = self.path(session_id)
+        try:
+            with open(path, 'rb') as f:
+                data = memoryview(f.read())
+        except FileNotFoundError:
+            return
+        valid = 0
+        for *_, end in self._records(data):
+            valid = end
+        if valid < len(data):
+            print(f"Spool : fin tronquée de la session {session_id} supprimée ({len(data) - valid} octets)")
+            os.truncate(path, valid)
+
+    def close_session(self, session_id, discard=None):
+        """Fermer une session. Le fichier est supprimé si la session est complète (ou si `discard`)."""
+        with self._lock:
+            handle = self._handles.pop(session_id, None)
+            if handle:
+                handle[0].flush()
+                os.fsync(handle[0].fileno())
+                handle[0].close()
+        if discard is None:
+            chunks, acked, has_final = self.read_session(session_id)
+            discard = has_final and all(number in acked for number in chunks)
+        if discard:
+            try:
+                os.remove(self.path(session_id))
+            except FileNotFoundError:
+                pass
+        return discard
+
+    def append_chunk(self, session_id, chunk_number, is_final, meta, payload):
+        """Conserver un segment encodé. Un nouvel enregistrement du même numéro remplace le précédent."""
+        flags = self.FLAG_FINAL if is_final else 0
+        self._append(session_id, self.RECORD_CHUNK, flags, chunk_number,
+                     json.dumps(meta).encode('utf-8'), payload, force_sync=is_final)
+        self.enforce_limit()
+
+    def ack(self, session_id, chunk_number):
+        self._append(session_id, self.RECORD_ACK, 0, chunk_number, b'', b'')
+
+    def _append(self, session_id, kind, flags, chunk_number, meta, payload, force_sync=False):
+        crc = zlib.crc32(payload, zlib.crc32(meta))
+        header = self.HEADER.pack(self.MAGIC, kind, flags, chunk_number, len(meta), len(payload), crc)
+        with self._lock:
+            self.open_session(session_id)
+            handle = self._handles[session_id]
+            handle[0].write(header)
+            handle[0].write(meta)
+            handle[0].write(payload)
+            handle[0].flush()  # Dans le cache système : survit à un plantage de l'application
+            handle[1] += 1
+            # Validation groupée : le fsync se fait dans un thread dédié, jamais sur le chemin d'envoi
+            self._start_syncer()
+            if force_sync or handle[1] >= self.fsync_every:
+                self._sync_wake.set()
+
+    def _start_syncer(self):
+        if self._syncer is None:
+            self._syncer = threading.Thread(target=self._sync_loop, name="spool-fsync", daemon=True)
+            self._syncer.start()
+
+    def _sync_loop(self):
+        while True:
+            self._sync_wake.wait(self.fsync_interval)
+            self._sync_wake.clear()
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"Spool : échec de synchronisation : {e}")
+
+    def sync(self):
+        """Forcer sur disque tous les journaux ouverts ayant des enregistrements non synchronisés."""
+        with self._lock:
+            descriptors = []
+            for handle in self._handles.values():
+                if handle[1]:
+                    # Copie du descripteur : le fsync se fait hors du verrou, même si la session se ferme
+                    descriptors.append(os.dup(handle[0].fileno()))
+                    handle[1] = 0
+        for fd in descriptors:
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _records(self, data):
+        """Enregistrements intacts d'un journal : (type, drapeaux, numéro, méta, contenu, fin)."""
+        offset = 0
+        size = self.HEADER.size
+        while offset + size <= len(data):
+            magic, kind, flags, number, meta_len, payload_len, crc = self.HEADER.unpack_from(data, offset)
+            end = offset + size + meta_len + payload_len
+            if magic != self.MAGIC or end > len(data):
+                return  # Fin tronquée par un arrêt brutal
+            meta = data[offset + size:offset + size + meta_len]
+            payload = data[offset + size + meta_len:end]
+            if zlib.crc32(payload, zlib.crc32(meta)) != crc:
+                return
+            yield kind, flags, number, meta, payload, end
+            offset = end
+
+    def read_session(self, session_id):
+        """Relire un journal : (segments {numéro: (final, méta, contenu)}, numéros acquittés, final présent)."""
+        chunks, acked = {}, set()
+        try:
+            with open(self.path(session_id), 'rb') as f:
+                data = memoryview(f.read())
+        except FileNotFoundError:
+            return chunks, acked, False
+
+        for kind, flags, number, meta, payload, _ in self._records(data):
+            if kind == self.RECORD_CHUNK:
+                chunks[number] = (bool(flags & self.FLAG_FINAL), json.loads(bytes(meta)), payload)
+            elif kind == self.RECORD_ACK:
+                acked.add(number)
+        has_final = any(is_final for is_final, _, _ in chunks.values())
+        return chunks, acked, has_final
+
+    def pending_chunks(self, session_id):
+        """Segments non acquittés, par numéro croissant, et présence d'un segment final."""
+        chunks, acked, has_final = self.read_session(session_id)
+        pending = [
+            (number, is_final, meta, payload)
+            for number, (is_final, meta, payload) in sorted(chunks.items())
+            if number not in acked
+        ]
+        return pending, has_final
+
+    def pending_sessions(self):
+        """Sessions fermées encore présentes dans le spool, de la plus ancienne à la plus récente."""
+        with self._lock:
+            active = set(self._handles)
+        sessions = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.EXTENSION):
+                session_id = entry.name[:-len(self.EXTENSION)]
+                if session_id not in active:
+                    sessions.append((entry.stat().st_mtime, session_id))
+        return [session_id for _, session_id in sorted(sessions)]
+
+    def enforce_limit(self):
+        """Évincer les sessions fermées les plus anciennes au-delà de `max_bytes`."""
+        total = sum(
+            entry.stat().st_size for entry in os.scandir(self.directory)
+            if entry.name.endswith(self.EXTENSION)
+        )
+        for session_id in self.pending_sessions():
+            if total <= self.max_bytes:
+                break
+            path = self.path(session_id)
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evicted_sessions += 1
+            print(f"Spool plein : session {session_id} abandonnée ({size / 1024:.0f} Ko)")
+
+class SpoolDrainer(QThread):
+    """Renvoi en arrière-plan des sessions restées dans le spool."""
+    session_recovered = pyqtSignal(str, str, int)  # Session, transcription finale, ID de téléchargement
+
+    def __init__(self, spool, backend, base_delay=5.0, max_delay=300.0):
+        super().__init__()
+        self.spool = spool
+        self.backend = backend
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._wake_event = threading.Event()
+        self._reset_backoff = False
+        self._stopping = False
+        self._next_attempt = {}  # session_id -> (échéance, délai courant)
+
+    def wake(self):
+        """Retenter immédiatement (connexion rétablie, nouvelle session différée)."""
+        self._reset_backoff = True
+        self._wake_event.set()
+
+    def stop(self):
+        self._stopping = True
+        self._wake_event.set()
+        self.wait(2000)
+
+    def run(self):
+        while not self._stopping:
+            if self._reset_backoff:
+                self._reset_backoff = False
+                self._next_attempt.clear()
+            timeout = 30.0
+            if self.backend.ready:
+                for session_id in self.spool.pending_sessions():
+                    if self._stopping:
+                        return
+                    due, delay = self._next_attempt.get(session_id, (0.0, 0.0))
+                    now = time.monotonic()
+                    if due > now:
+                        timeout = min(timeout, due - now)
+                        continue
+                    if self.drain_session(session_id):
+                        self._next_attempt.pop(session_id, None)
+                    else:
+                        delay = min(self.max_delay, max(self.base_delay, delay * 2))
+                        wait = random.uniform(delay / 2, delay)
+                        self._next_attempt[session_id] = (time.monotonic() + wait, delay)
+                        timeout = min(timeout, wait)
+            self._wake_event.wait(timeout)
+            self._wake_event.clear()
+
+    def drain_session(self, session_id):
+        """Renvoyer les segments non acquittés d'une session. Retourne True si elle est soldée."""
+        done = False
+        self.spool.open_session(session_id)
+        try:
+            pending, has_final = self.spool.pending_chunks(session_id)
+            if not pending and not has_final:
+                pending = self.closing_chunk(session_id)
+                if not pending:
+                    print(f"Session {session_id} interrompue sans segment à renvoyer : abandon")
+            last_number = pending[-1][0] if pending else None
+            for chunk_number, is_final, meta, payload in pending:
+                is_final = is_final or (not has_final and chunk_number == last_number)
+                try:
+                    if is_final:
+                        transcription, upload_id, _ = self.backend.finalize(session_id, chunk_number, meta, payload)
+                    else:
+                        self.backend.submit_chunk(session_id, chunk_number, meta, payload)
+                except BackendError as e:
+                    print(f"Renvoi du segment {chunk_number} (session {session_id}) refusé : {e}")
+                    return False
+                self.spool.ack(session_id, chunk_number)
+                if is_final and upload_id:
+                    self.session_recovered.emit(session_id, transcription, int(upload_id))
+            done = True
+            return True
+        except Exception as e:
+            print(f"Erreur lors du renvoi de la session {session_id} : {e}")
+            return False
+        finally:
+            self.spool.close_session(session_id, discard=True if done else None)
+
+    def closing_chunk(self, session_id):
+        """Segments tous acquittés mais session jamais close : segment final vide à envoyer, ou [] si rien n'est parti."""
+        chunks, _, _ = self.spool.read_session(session_id)
+        if not chunks:
+            return []
+        last_number = max(chunks)
+        samplerate = chunks[last_number][1].get('fields', {}).get('sample_rate', 16000)
+        encoder = WavEncoder(int(samplerate))
+        return [(last_number + 1, True, chunk_upload_meta(encoder), bytes(encoder.encode([])))]
+
+class TranscriptStitcher:
+    """Recollage côté client des transcriptions de segments qui se chevauchent."""
+    def __init__(self, window=40, min_match=2, max_gap=2):
+        self.window = window
+        self.min_match = min_match  # Un seul mot ne suffit que s'il est en bordure des deux côtés
+        self.max_gap = max_gap
+        self._tail = []  # Derniers mots émis, normalisés
+
+    def reset(self):
+        self._tail = []
+
+    @staticmethod
+    def normalize(word):
+        return ''.join(c for c in word.lower() if c.isalnum())
+
+    def overlap_length(self, head):
+        """Nombre de mots de tête de `head` (normalisés) déjà émis, 0 si aucun recouvrement fiable."""
+        tail = self._tail
+        best_size, best_end = 0, 0
+        runs = [0] * (len(head) + 1)
+        for i, word in enumerate(tail):
+            previous, runs = runs, [0] * (len(head) + 1)
+            for j, key in enumerate(head):
+                if key == word:
+                    runs[j + 1] = previous[j] + 1
+            if len(tail) - 1 - i > self.max_gap:
+                continue
+            for end in range(1, len(head) + 1):
+                size = runs[end]
+                if size > best_size or (size == best_size and size and end < best_end):
+                    if size >= self.min_match or (i == len(tail) - 1 and end - size <= self.max_gap):
+                        best_size, best_end = size, end
+        return best_end
+
+    def stitch(self, text):
+        """Partie nouvelle de `text` par rapport au texte déjà émis."""
+        words = text.split()
+        if not words:
+            return ''
+        keys = [self.normalize(word) for word in words]
+        skip = self.overlap_length(keys[:self.window])
+        self._tail = (self._tail + keys[skip:])[-self.window:]
+        return ' '.join(words[skip:])
+
+class ReorderBuffer:
+    """Remise en ordre des résultats de segments envoyés en parallèle."""
+    def __init__(self, on_release=None):
+        self.on_release = on_release
+        self.next_chunk = 0
+        self._results = {}
+        self._cond = threading.Condition()
+
+    def put(self, chunk_number, result):
+        with self._cond:
+            self._results[chunk_number] = result
+            while self.next_chunk in self._results:
+                value = self._results.pop(self.next_chunk)
+                if self.on_release:
+                    self.on_release(self.next_chunk, value)
+                self.next_chunk += 1
+            self._cond.notify_all()
+
+    def wait_until(self, chunk_number, timeout=None):
+        """Attendre que les segments 0 à chunk_number - 1 soient acquittés."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.next_chunk >= chunk_number, timeout)
+
+class BackendClient:
+    """Client HTTP partagé par tous les appels au backend."""
+    DEFAULT_TIMEOUTS = {  # (connexion, lecture) en secondes
+        'default': (5, 30),
+        'token': (5, 20),
+        'users': (5, 20),
+        'share': (5, 20),
+        'process_chunk': (5, 120),
+    }
+    RETRY_STATUSES = (502, 503, 504)
+
+    def __init__(self, base_url, token=None, timeouts=None, pool_size=8,
+                 max_retries=3, backoff=0.5, max_backoff=8.0):
+        self.base_url = base_url
+        self.token = token
+        self.on_unauthorized = None  # f(en-tête refusé) -> nouveau jeton ou None
+        self.timeouts = dict(self.DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Session HTTP créée au premier usage : `requests` n'est pas importé au lancement."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(
+                        pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0
+                    )
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+        return self._session
+
+    @property
+    def base_url(self):
+        return self._base_url
+
+    @base_url.setter
+    def base_url(self, url):
+        self._base_url = url.rstrip('/')
+
+    def request(self, method, path, endpoint='default', idempotent=None, auth=True, headers=None, **kwargs):
+        """Envoyer une requête au backend. Retourne la réponse, quel que soit son code."""
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in ('GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS')
+        headers = dict(headers or {})
+        if auth and self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        timeout = self.timeouts.get(endpoint, self.timeouts['default'])
+        body = kwargs.get('data')
+
+        attempt = 0
+        reauthenticated = False
+        while True:
+            if hasattr(body, 'seek'):
+                body.seek(0)
+            try:
+                response = self.session.request(
+                    method, f"{self.base_url}{path}", headers=headers, timeout=timeout, **kwargs
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                retryable = idempotent or self._never_connected(e)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+            else:
+                if response.status_code == 401 and auth and self.on_unauthorized and not reauthenticated:
+                    reauthenticated = True
+                    token = self.on_unauthorized(headers.get('Authorization'))
+                    if token:
+                        response.close()
+                        headers['Authorization'] = f'Bearer {token}'
+                        continue
+                if not (idempotent and response.status_code in self.RETRY_STATUSES) or attempt >= self.max_retries:
+                    return response
+                response.close()
+
+            time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+            attempt += 1
+
+    def warm_up(self):
+        """Ouvrir une connexion vers le backend à l'avance pour que le premier envoi la trouve prête."""
+        try:
+            self.session.head(f"{self.base_url}/", timeout=self.timeouts['default']).close()
+        except requests.RequestException:
+            pass
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+    @staticmethod
+    def _never_connected(error):
+        """Vrai si la requête n'a pas pu partir (échec de connexion) : la rejouer est sans risque."""
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, urllib3.exceptions.NewConnectionError)
+
+def native_input_rate(device=None, default=16000):
+    """Fréquence native du périphérique d'entrée, pour l'ouvrir sans conversion du pilote."""
+    try:
+        return int(sd.query_devices(device, 'input')['default_samplerate'])
+    except Exception as e:
+        print(f"Fréquence du micro inconnue, {default} Hz par défaut : {e}")
+        return default
+
+class PolyphaseResampler:
+    """Conversion de fréquence par blocs (filtre polyphase, sinc fenêtré de Kaiser)."""
+    def __init__(self, in_rate, out_rate, zero_crossings=16, beta=8.0, rolloff=0.9):
+        g = np.gcd(int(in_rate), int(out_rate))
+        self.up = int(out_rate) // g
+        self.down = int(in_rate) // g
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.passthrough = self.up == self.down
+        if self.passthrough:
+            return
+
+        # Filtre prototype à la fréquence suréchantillonnée, coupure sous la plus basse des deux Nyquist
+        ratio = max(self.up, self.down)
+        self.taps = int(np.ceil(2 * zero_crossings * ratio / self.up))
+        length = self.taps * self.up
+        cutoff = rolloff / (2 * ratio)
+        t = np.arange(length) - (length - 1) / 2
+        prototype = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(length, beta) * self.up
+        # phases[p, j] = h[p + j * up], inversé pour s'appliquer à une fenêtre dans l'ordre chronologique
+        self.phases = np.ascontiguousarray(prototype.reshape(self.taps, self.up).T[:, ::-1], dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        if self.passthrough:
+            return
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._consumed = 0  # Échantillons d'entrée déjà reçus
+        self._next = 0  # Position du prochain échantillon de sortie, en échantillons suréchantillonnés
+
+    def process(self, block):
+        if self.passthrough:
+            return self.to_int16(block)
+        buffer = np.concatenate((self._history, np.asarray(block, dtype=np.float32)))
+        base = self._consumed - len(self._history)  # Indice absolu de buffer[0]
+        last = self._consumed + len(block) - 1
+        count = (last * self.up + self.up - 1 - self._next) // self.down + 1
+        if count <= 0 or not len(block):
+            output = np.zeros(0, dtype=np.int16)
+        else:
+            positions = self._next + self.down * np.arange(count, dtype=np.int64)
+            indices = positions // self.up - base
+            windows = np.lib.stride_tricks.sliding_window_view(buffer, self.taps)[indices - (self.taps - 1)]
+            output = self.to_int16(np.einsum('ij,ij->i', windows, self.phases[positions % self.up]))
+            self._next += count * self.down
+        self._consumed += len(block)
+        self._history = buffer[len(buffer) - (self.taps - 1):]
+        return output
+
+    @staticmethod
+    def to_int16(samples):
+        if samples.dtype == np.int16:
+            return samples
+        return np.clip(np.rint(samples * 32767), -32768, 32767).astype(np.int16)
+
+class BackendError(Exception):
+    """Échec d'un appel au backend ; `status` est le code HTTP, ou None sans réponse."""
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+class TranscriptionBackend:
+    """Contrat d'un backend de transcription, indépendant du transport."""
+    model = TRANSCRIPTION_MODEL
+    metrics = None  # PipelineMetrics optionnel : instant d'envoi du dernier octet (body_sent)
+
+    @property
+    def ready(self):
+        """Vrai si le backend peut recevoir des segments (session authentifiée)."""
+        return True
+
+    def warm_up(self):
+        pass
+
+    def submit_chunk(self, session_id, chunk_number, meta, payload):
+        """Envoyer un segment intermédiaire. Retourne sa transcription."""
+        raise NotImplementedError
+
+    def finalize(self, session_id, chunk_number, meta, payload):
+        """Envoyer le dernier segment : (transcription, upload_id, transcription du segment final ou None)."""
+        raise NotImplementedError
+
+    def share(self, upload_id, user_id, access_type):
+        raise NotImplementedError
+
+    def share_many(self, upload_id, shares, on_result=None, max_workers=4):
+        """Partager avec plusieurs utilisateurs en parallèle. Retourne {user_id: erreur ou None}."""
+        results = {}
+
+        def share_one(user_id, access_type):
+            try:
+                self.share(upload_id, user_id, access_type)
+                return None
+            except Exception as e:
+                return e
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(shares)))) as pool:
+            futures = {pool.submit(share_one, user_id, access_type): user_id for user_id, access_type in shares}
+            for future in concurrent.futures.as_completed(futures):
+                user_id = futures[future]
+                results[user_id] = future.result()
+                if on_result:
+                    on_result(user_id, results[user_id])
+        return results
+
+class HttpTranscriptionBackend(TranscriptionBackend):
+    """Backend HTTP : point d'accès multipart /process-chunk/ et /share/."""
+    def __init__(self, client, model=TRANSCRIPTION_MODEL):
+        self.client = client
+        self.model = model
+        self.bulk_share = None  # Point d'accès de partage groupé : inconnu tant qu'il n'a pas été essayé
+
+    @property
+    def ready(self):
+        return bool(self.client.token)
+
+    def warm_up(self):
+        self.client.warm_up()
+
+    def post_chunk(self, session_id, chunk_number, is_final, meta, payload):
+        data = {
+            'chunk_number': chunk_number,
+            'session_id': session_id,
+            'is_final': str(is_final).lower(),
+            'model': self.model,
+        }
+        # Les champs enregistrés avec le segment (codec, modèle d'origine) priment
+        data.update(meta['fields'])
+        body = MultipartBody(data, 'file', meta['filename'], payload, meta['content_type'])
+        try:
+            response = self.client.post(
+                "/process-chunk/",
+                endpoint='process_chunk',
+                data=body,
+                headers={'Content-Type': body.content_type}
+            )
+        except requests.RequestException as e:
+            raise BackendError(str(e)) from e
+        if self.metrics and body.sent_at is not None:
+            self.metrics.mark(session_id, chunk_number, 'body_sent', body.sent_at)
+        if response.status_code != 200:
+            raise BackendError(f"Erreur de l'API : {response.status_code}", response.status_code)
+        return response.json()
+
+    def submit_chunk(self, session_id, chunk_number, meta, payload):
+        result = self.post_chunk(session_id, chunk_number, False, meta, payload)
+        return result.get('chunk_transcription', '')
+
+    def finalize(self, session_id, chunk_number, meta, payload):
+        result = self.post_chunk(session_id, chunk_number, True, meta, payload)
+        return result.get('transcription', ''), result.get('upload_id'), result.get('chunk_transcription')
+
+    def share(self, upload_id, user_id, access_type):
+        try:
+            # Partager deux fois avec le même utilisateur est sans effet : appel idempotent
+            response = self.client.post(
+                f"/share/{upload_id}/user/",
+                endpoint='share',
+                idempotent=True,
+                json={'user_id': user_id, 'access_type': access_type}
+            )
+        except requests.RequestException as e:
+            raise BackendError(str(e)) from e
+        if response.status_code not in (200, 201):
+            raise BackendError(f"Erreur de l'API : {response.status_code}", response.status_code)
+
+    def share_many(self, upload_id, shares, on_result=None, max_workers=4):
+        """Un seul appel /share/{id}/users/ si le backend le propose, sinon un appel par utilisateur."""
+        if self.bulk_share is not False and len(shares) > 1:
+            try:
+                response = self.client.post(
+                    f"/share/{upload_id}/users/",
+                    endpoint='share',
+                    idempotent=True,
+                    json={'shares': [{'user_id': user_id, 'access_type': access_type} for user_id, access_type in shares]}
+                )
+            except requests.RequestException as e:
+                response = None
+                print(f"Partage groupé indisponible : {e}")
+            if response is not None and response.status_code in (404, 405):
+                self.bulk_share = False  # Ancien backend : on ne réessaie plus
+            elif response is not None and response.status_code in (200, 201):
+                self.bulk_share = True
+                results = {}
+                for user_id, _ in shares:
+                    results[user_id] = None
+                    if on_result:
+                        on_result(user_id, None)
+                return results
+        return super().share_many(upload_id, shares, on_result, max_workers)
+
+class FakeTranscriptionBackend(TranscriptionBackend):
+    """Backend simulé en mémoire, déterministe, pour les essais hors ligne."""
+    VOCABULARY = (
+        "le patient présente une amélioration nette depuis la dernière consultation "
+        "examen clinique sans particularité traitement poursuivi contrôle prévu dans un mois"
+    ).split()
+
+    def __init__(self, latency=0.3, jitter=0.1, error_rate=0.0, seed=0, words_per_second=2.5):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self.words_per_second = words_per_second
+        self._lock = threading.Lock()
+        self._sessions = {}  # session_id -> {numéro de segment: texte}
+        self._next_upload_id = 1
+        self.shares = []
+        self.calls = 0
+        self.errors = 0
+
+    def _call(self, session_id, chunk_number, meta, payload):
+        rng = random.Random(f"{self.seed}:{session_id}:{chunk_number}")
+        with self._lock:
+            self.calls += 1
+        if self.metrics:
+            self.metrics.mark(session_id, chunk_number, 'body_sent')
+        time.sleep(max(0.0, rng.gauss(self.latency, self.jitter)))
+        if rng.random() < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            raise BackendError("Erreur de l'API : 503 (simulée)", 503)
+        fields = meta['fields']
+        seconds = len(payload) / 2 / int(fields.get('sample_rate', 16000))
+        if fields.get('codec', 'wav') != 'wav':
+            seconds *= 8  # Débit compressé : ordre de grandeur suffisant pour une simulation
+        count = max(1, round(seconds * self.words_per_second))
+        text = ' '.join(rng.choice(self.VOCABULARY) for _ in range(count))
+        with self._lock:
+            self._sessions.setdefault(session_id, {})[chunk_number] = text
+        return text
+
+    def submit_chunk(self, session_id, chunk_number, meta, payload):
+        return self._call(session_id, chunk_number, meta, payload)
+
+    def finalize(self, session_id, chunk_number, meta, payload):
+        text = self._call(session_id, chunk_number, meta, payload)
+        with self._lock:
+            chunks = self._sessions.pop(session_id, {})
+            upload_id = self._next_upload_id
+            self._next_upload_id += 1
+        return ' '.join(chunks[number] for number in sorted(chunks)), upload_id, text
+
+    def share(self, upload_id, user_id, access_type):
+        rng = random.Random(f"{self.seed}:share:{upload_id}:{user_id}")
+        time.sleep(max(0.0, rng.gauss(self.latency, self.jitter)))
+        if rng.random() < self.error_rate:
+            raise BackendError("Erreur de l'API : 503 (simulée)", 503)
+        with self._lock:
+            self.shares.append((upload_id, user_id, access_type))
+
+def create_transcription_backend(options, client):
+    """Backend de transcription choisi par les options d'enregistrement."""
+    if options['transcription_backend'] == 'fake':
+        return FakeTranscriptionBackend(**options['fake_backend'])
+    return HttpTranscriptionBackend(client, model=options['model'])
+
+class CaptureEngine:
+    """Flux micro maintenu ouvert entre les dictées, avec pré-enregistrement."""
+    def __init__(self, samplerate=16000, preroll_ms=500, input_samplerate=None, device=None):
+        self.samplerate = samplerate
+        self.device = device
+        self.input_samplerate = input_samplerate  # None : fréquence native, déterminée à l'ouverture
+        self.resampler = None
+        self._preroll = None
+        if preroll_ms > 0:
+            self._preroll = np.zeros(int(samplerate * preroll_ms / 1000), dtype=np.int16)
+        self._position = 0
+        self._filled = 0
+        self._sink = None
+        self._lock = threading.Lock()  # Jamais tenu longtemps : partagé avec le callback audio
+        self._stream = None
+
+    @property
+    def active(self):
+        return self._stream is not None and self._stream.active
+
+    def start(self):
+        """Ouvrir le périphérique (bloquant : à appeler hors du thread de l'interface)."""
+        if self._stream is not None:
+            return
+        rate = self.input_samplerate or native_input_rate(self.device, self.samplerate)
+        self.resampler = PolyphaseResampler(rate, self.samplerate)
+        stream = sd.InputStream(
+            samplerate=rate,
+            channels=1,
+            dtype=np.float32,
+            device=self.device,
+            callback=self._callback
+        )
+        stream.start()
+        self._stream = stream
+
+    def stop(self):
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception as e:
+                print(f"Erreur lors de la fermeture du micro : {e}")
+
+    def attach(self, sink):
+        """Diriger le flux vers `sink(block)`, en commençant par le pré-enregistrement."""
+        with self._lock:
+            if self._filled:
+                sink(self._preroll_view())
+            self._sink = sink
+
+    def detach(self, sink=None):
+        """Après le retour, `sink` ne reçoit plus aucun bloc (sauf si un autre abonné l'a remplacé)."""
+        with self._lock:
+            if sink is not None and self._sink != sink:
+                return
+            self._sink = None
+            self._filled = 0  # Le pré-enregistrement suivant ne reprend pas la fin de la dictée
+            self._position = 0
+
+    def _callback(self, indata, frames, time_info, status):
+        block = self.resampler.process(indata[:, 0])
+        with self._lock:
+            if self._sink is not None:
+                self._sink(block)
+            elif self._preroll is not None:
+                self._remember(block)
+
+    def _remember(self, block):
+        size = len(self._preroll)
+        block = block[-size:]
+        frames = len(block)
+        first = min(frames, size - self._position)
+        self._preroll[self._position:self._position + first] = block[:first]
+        self._preroll[:frames - first] = block[first:]
+        self._position = (self._position + frames) % size
+        self._filled = min(size, self._filled + frames)
+
+    def _preroll_view(self):
+        # Début modulaire : après un arrêt, la position courante peut précéder le début des données
+        size = len(self._preroll)
+        start = (self._position - self._filled) % size
+        if start + self._filled <= size:
+            return self._preroll[start:start + self._filled]
+        return np.concatenate((self._preroll[start:], self._preroll[:self._position]))
+
+_session_id_lock = threading.Lock()
+_last_session_id = 0
+
+def new_session_id():
+    """Identifiant de session unique dans le processus : horodatage en ms, strictement croissant."""
+    global _last_session_id
+    with _session_id_lock:
+        _last_session_id = max(_last_session_id + 1, int(time.time() * 1000))
+        return str(_last_session_id)
+
+class RecorderThread(QThread):
+    finished = pyqtSignal(str, int, int)  # Texte final, ID de téléchargement et numéro du segment
+    error = pyqtSignal(str)
+    transcription_update = pyqtSignal(str, int)  # Émis pour chaque segment, même sans texte
+    stop_latency = pyqtSignal(float)  # Délai entre la demande d'arrêt et le texte final (ms)
+    session_deferred = pyqtSignal(str)  # Session confiée au spool, finalisée plus tard
+    closed = pyqtSignal(str)  # Session terminée : plus aucun signal ne suivra
+
+    def __init__(self, backend, options=None, spool=None, session_store=None, capture=None, metrics=None):
+        super().__init__()
+        options = dict(DEFAULT_RECORDING_OPTIONS, **(options or {}))
+        self.backend = backend
+        self.metrics = metrics or PipelineMetrics()
+        self.capture = capture  # Micro maintenu ouvert par la fenêtre principale (optionnel)
+        self.input_samplerate = options['input_samplerate']
+        self.spool = spool  # Journal disque des segments non acquittés (optionnel)
+        self.session_store = session_store  # Enregistrement complet projeté en mémoire (optionnel)
+        self.deferred = False  # Un segment n'a pas abouti : la fin de session passe par le spool
+        self.is_recording = False
+        self.samplerate = 16000
+        self.chunk_duration = options['chunk_duration']  # Durée des segments en secondes
+        self.samples_per_chunk = self.samplerate * self.chunk_duration
+        self.max_queued_chunks = options['max_queued_chunks']  # Segments scellés en attente d'envoi
+        self.max_inflight_uploads = options['max_inflight_uploads']
+        self.overflow_policy = options['overflow_policy']
+        self.persist_chunks = options['persist_chunks']  # Conserver les segments encodés sur disque
+        self.codec = options['codec']
+        self.codec_params = options['codec_params']
+        self.trimmer = None
+        if options['trim_silence']:
+            self.trimmer = SilenceTrimmer(
+                self.samplerate,
+                max_gap_ms=options['max_silence_ms'],
+                padding_ms=options['silence_padding_ms'],
+                threshold_db=options['silence_threshold_db']
+            )
+        self.trim_stats = {'seconds_saved': 0.0, 'bytes_saved': 0}
+        self._stats_lock = threading.Lock()
+        self.segmenter = None
+        if options['chunking'] == 'vad':
+            self.segmenter = VadSegmenter(
+                self.samplerate,
+                min_seconds=options['min_chunk_duration'],
+                max_seconds=self.chunk_duration,
+                min_pause_ms=options['min_pause_ms'],
+                threshold_db=options['silence_threshold_db']
+            )
+        self.overlap_frames = int(options['overlap_seconds'] * self.samplerate)
+        self.stitcher = TranscriptStitcher() if self.overlap_frames else None
+        self.stitched_chunks = []  # Textes partiels recollés, dans l'ordre (texte final côté client)
+        self.session_id = new_session_id()
+        self.ring_buffer = None
+        self.upload_pipeline = None
+        self.reorder_buffer = ReorderBuffer(self.release_transcription)
+        self.level_meter = LevelMeter()  # Lu par l'interface, jamais poussé depuis le callback
+        self._stop_event = threading.Event()
+        self._own_capture = None
+        self.stop_requested_at = None
+        self._encoders = threading.local()
+        self.selectedUploadId = None  # Ajout de cet attribut
+        # Supprimé self.all_transcriptions
+
+    def request_stop(self):
+        """Demander l'arrêt : le thread se réveille aussitôt et scelle le segment final."""
+        self.stop_requested_at = time.monotonic()
+        self._stop_event.set()
+
+    def create_ring_buffer(self):
+        """Tampon dimensionné pour les segments en cours, ou fichier projeté avec un magasin de sessions."""
+        buffer = None
+        if self.session_store:
+            try:
+                buffer = self.session_store.create(self.session_id, self.samplerate)
+            except Exception as e:
+                print(f"Enregistrement de session indisponible, repli sur le tampon mémoire : {e}")
+        if buffer is None:
+            capacity = self.samplerate * self.chunk_duration * (self.max_queued_chunks + self.max_inflight_uploads + 1)
+            buffer = AudioRingBuffer(capacity + self.overlap_frames)
+        buffer.retain = self.overlap_frames
+        return buffer
+
+    def seal_chunk(self, is_final=False, frames=None, block=None):
+        """Sceller l'audio accumulé et le confier au pipeline d'envoi (sans encodage ni réseau)."""
+        chunk = self.ring_buffer.seal(frames, is_final=is_final)
+        if chunk is None:
+            return False
+        return self.upload_pipeline.submit(chunk, chunk.frames, block=True if is_final else block)
+
+    def on_audio(self, block):
+        """Bloc capturé (thread audio) : copie dans le tampon, vumètre et scellé éventuel."""
+        if not self.is_recording:
+            return
+        written = self.ring_buffer.write(block)
+
+        # Niveau audio : publié sans signal, l'interface le lit à cadence fixe
+        self.level_meter.update(block)
+
+        # Le callback ne fait que sceller : l'envoi est asynchrone
+        if self.segmenter:
+            cut = self.segmenter.feed(block[:written])
+            if cut:
+                self.seal_chunk(False, cut)
+        elif self.ring_buffer.pending >= self.samples_per_chunk:
+            self.seal_chunk(False)
+
+    def capture_audio(self):
+        """Capturer jusqu'à la demande d'arrêt, via le micro partagé s'il est ouvert."""
+        capture = self.capture
+        if not (capture and capture.active):
+            # Micro ouvert pour cette dictée seulement
+            capture = CaptureEngine(self.samplerate, preroll_ms=0, input_samplerate=self.input_samplerate)
+            capture.start()
+            self._own_capture = capture  # Fermé par finish_session, une fois le segment final envoyé
+        try:
+            capture.attach(self.on_audio)
+            # Attente passive : réveil immédiat à la demande d'arrêt
+            self._stop_event.wait()
+        finally:
+            # Après detach, plus aucun bloc n'arrive : le segment final peut être scellé
+            capture.detach(self.on_audio)
+            self.is_recording = False
+
+    def close_own_capture(self):
+        """Fermer le micro ouvert pour cette dictée (plusieurs centaines de ms sur certains périphériques)."""
+        capture, self._own_capture = self._own_capture, None
+        if capture is not None:
+            capture.stop()
+
+    def get_encoder(self):
+        """Encodeur propre à chaque worker : son tampon mémoire est réutilisé d'un segment à l'autre."""
+        encoder = getattr(self._encoders, 'encoder', None)
+        if encoder is None or encoder.codec != self.codec:
+            try:
+                encoder = create_encoder(self.codec, self.samplerate, self.codec_params)
+            except ValueError as e:
+                # Codec inconnu (faute de frappe dans config.json) : même repli que pour un codec indisponible
+                print(f"{e} : repli sur WAV")
+                self.codec = 'wav'
+                encoder = create_encoder('wav', self.samplerate)
+            self._encoders.encoder = encoder
+        return encoder
+
+    def post_chunk(self, encoder, payload, chunk_number, is_final, overlap=0):
+        """Transmettre un segment : sa transcription, le résultat de finalize, ou None si confié au spool."""
+        meta = chunk_upload_meta(encoder)
+        if overlap:
+            # Informatif : le recollage se fait côté client, le backend peut l'ignorer
+            meta['fields']['overlap_ms'] = int(overlap * 1000 / self.samplerate)
+        if self.spool:
+            # Conservé jusqu'à l'acquittement, pour survivre à un échec réseau ou à un plantage
+            self.spool.append_chunk(self.session_id, chunk_number, is_final, meta, payload)
+            if is_final and self.deferred:
+                return None
+        if is_final:
+            return self.backend.finalize(self.session_id, chunk_number, meta, payload)
+        return self.backend.submit_chunk(self.session_id, chunk_number, meta, payload)
+
+    def persist_chunk(self, chunk_number, encoder, payload):
+        """Mode persistance : conserver une copie du segment encodé dans le répertoire de données."""
+        try:
+            session_dir = get_data_directory('chunks', self.session_id)
+            path = os.path.join(session_dir, f"chunk_{chunk_number:04d}.{encoder.extension}")
+            with open(path, 'wb') as f:
+                f.write(payload)
+        except Exception as e:
+            print(f"Impossible de conserver le segment {chunk_number} : {e}")
+
+    def process_chunk(self, chunk, chunk_number):
+        """Encoder et envoyer un segment scellé (exécuté dans un worker du pipeline)."""
+        is_final = chunk.is_final
+        chunk_trans = ''
+        mark = lambda event: self.metrics.mark(self.session_id, chunk_number, event)
+        self.metrics.mark(self.session_id, chunk_number, 'sealed', chunk.sealed_at)
+        mark('encode_start')
+        try:
+            try:
+                encoder = self.get_encoder()
+                # Encodage en mémoire directement depuis le tampon circulaire
+                if self.trimmer:
+                    arrays, removed = self.trimmer.compact(chunk.arrays())
+                    segments = [memoryview(array) for array in arrays]
+                else:
+                    segments, removed = chunk.memoryviews(), 0
+                payload = encoder.encode(segments)
+                mark('encoded')
+                if removed:
+                    self.record_trim(removed, chunk.frames, len(payload))
+                if self.persist_chunks:
+                    self.persist_chunk(chunk_number, encoder, payload)
+                if is_final:
+                    # Le backend ne clôt la session qu'une fois tous les segments précédents acquittés
+                    self.reorder_buffer.wait_until(chunk_number)
+
+                mark('upload_start')
+                try:
+                    result = self.post_chunk(encoder, payload, chunk_number, is_final, chunk.overlap)
+                except BackendError as e:
+                    if e.status not in (400, 415, 422) or encoder.codec == 'wav':
+                        raise
+                    # Codec refusé par le backend : repli sur WAV pour ce segment et les suivants
+                    print(f"Codec {encoder.codec} refusé par le backend ({e.status}) : repli sur WAV")
+                    self.codec = 'wav'
+                    encoder = self.get_encoder()
+                    payload = encoder.encode(segments)
+                    result = self.post_chunk(encoder, payload, chunk_number, is_final, chunk.overlap)
+            finally:
+                chunk.release()
+
+            if result is None:
+                # Un segment précédent n'a pas abouti : le spool enverra la fin de session dans l'ordre
+                self.session_deferred.emit(self.session_id)
+                return
+            mark('response')
+            if self.spool:
+                self.spool.ack(self.session_id, chunk_number)
+            if is_final:
+                final_trans, self.selectedUploadId, last_trans = result
+                if self.stitcher:
+                    final_trans = self.stitched_transcription(final_trans, last_trans)
+                if final_trans and self.selectedUploadId:
+                    # Segment final : déjà dans l'ordre, aucune attente de remise en ordre
+                    mark('released')
+                    self.finished.emit(final_trans, self.selectedUploadId, chunk_number)
+                    if self.stop_requested_at is not None:
+                        latency = time.monotonic() - self.stop_requested_at
+                        self.metrics.record('stop_to_text', latency)
+                        self.stop_latency.emit(latency * 1000)
+            else:
+                chunk_trans = result
+
+        except BackendError as e:
+            self.defer_chunk(chunk_number, is_final)
+            self.error.emit(str(e) if e.status else f"Erreur lors de l'envoi du segment : {str(e)}")
+
+        except Exception as e:
+            self.defer_chunk(chunk_number, is_final)
+            self.error.emit(f"Erreur lors de l'envoi du segment : {str(e)}")
+
+        if not is_final:
+            self.reorder_buffer.put(chunk_number, chunk_trans)
+
+    def defer_chunk(self, chunk_number, is_final):
+        """Segment non acquitté : il reste dans le spool, qui renverra la suite de la session."""
+        if self.spool:
+            self.deferred = True
+            if is_final:
+                self.session_deferred.emit(self.session_id)
+
+    def release_transcription(self, chunk_number, chunk_trans):
+        """Émission des transcriptions partielles, strictement dans l'ordre des segments."""
+        self.metrics.mark(self.session_id, chunk_number, 'released')
+        if self.stitcher:
+            # Segments chevauchants : ne garder que les mots nouveaux
+            chunk_trans = self.stitcher.stitch(chunk_trans)
+            self.stitched_chunks.append(chunk_trans)
+        # Émettre uniquement le chunk actuel ; un texte vide permet au collage de ne pas l'attendre
+        self.transcription_update.emit(chunk_trans, chunk_number)
+
+    def stitched_transcription(self, server_text, last_trans):
+        """Texte final recollé côté client : le backend peut ignorer overlap_ms et répéter les chevauchements."""
+        if last_trans is None:
+            print("Transcription du segment final absente de la réponse : texte du backend conservé")
+            return server_text
+        parts = self.stitched_chunks + [self.stitcher.stitch(last_trans)]
+        return ' '.join(part for part in parts if part)
+
+    def record_trim(self, removed, frames, encoded_size):
+        """Cumuler le gain du compactage des silences (octets estimés au prorata de la taille encodée)."""
+        kept = max(1, frames - removed)
+        with self._stats_lock:
+            self.trim_stats['seconds_saved'] += removed / self.samplerate
+            self.trim_stats['bytes_saved'] += int(encoded_size * removed / kept)
+
+    def report_pipeline_stats(self):
+        stats = self.upload_pipeline.stats()
+        stats['dropped_frames'] += self.ring_buffer.dropped_frames
+        print(
+            f"Pipeline d'envoi (session {self.session_id}) : {stats['submitted']} segments, "
+            f"profondeur max {stats['max_queue_depth']}, {stats['dropped_chunks']} abandonnés "
+            f"({stats['dropped_frames']} échantillons)"
+        )
+        if self.trimmer:
+            print(
+                f"Silences compactés (session {self.session_id}) : "
+                f"{self.trim_stats['seconds_saved']:.1f} s et {self.trim_stats['bytes_saved'] / 1024:.0f} Ko économisés"
+            )
+        if stats['dropped_frames']:
+            seconds = stats['dropped_frames'] / self.samplerate
+            self.error.emit(f"File d'envoi saturée : {seconds:.1f} s d'audio perdues")
+
+    def start_session(self):
+        """Préparer le tampon de capture et le pipeline d'envoi ; `on_audio` peut ensuite être alimenté."""
+        self.ring_buffer = self.create_ring_buffer()
+        self.upload_pipeline = UploadPipeline(
+            self.process_chunk,
+            max_queued=self.max_queued_chunks,
+            workers=self.max_inflight_uploads,
+            overflow_policy=self.overflow_policy,
+            on_drop=lambda chunk: chunk.release(),
+            name=f"upload-{self.session_id}"
+        )
+        self.upload_pipeline.start()
+        if self.spool:
+            self.spool.open_session(self.session_id)
+        threading.Thread(target=self.backend.warm_up, daemon=True).start()
+        self.is_recording = True
+
+    def finish_session(self):
+        """Sceller le segment final puis attendre la fin de tous les envois."""
+        self.is_recording = False
+        if self.upload_pipeline is None:
+            # Échec de start_session avant la création du pipeline
+            self.close_own_capture()
+            if isinstance(self.ring_buffer, MappedSessionBuffer):
+                self.ring_buffer.close()
+            return
+        try:
+            # Traitement final : scellé et envoyé sans attendre, même sans audio en attente
+            # (la session doit être close côté backend)
+            self.seal_chunk(True)
+        finally:
+            # Le segment final est déjà parti : la fermeture du micro ne retarde plus le texte
+            self.close_own_capture()
+            self.upload_pipeline.close(wait=True)
+            if isinstance(self.ring_buffer, MappedSessionBuffer):
+                self.ring_buffer.close()
+            if self.spool:
+                # Supprimé si tout est acquitté ; sinon confié au drainer
+                self.spool.close_session(self.session_id)
+            self.report_pipeline_stats()
+            self.metrics.flush()
+
+    def run(self):
+        # Aucune exception ne doit sortir de QThread.run : PyQt interromprait le processus
+        if self.overflow_policy == 'block':
+            # Capture directe : le callback audio ne doit jamais attendre un envoi
+            print("Politique de débordement 'block' réservée au mode batch : repli sur drop_oldest")
+            self.overflow_policy = 'drop_oldest'
+        try:
+            try:
+                self.start_session()
+                self.capture_audio()
+            except Exception as e:
+                self.error.emit(str(e))
+            finally:
+                try:
+                    self.finish_session()
+                except Exception as e:
+                    self.error.emit(f"Erreur lors de la fin de session : {str(e)}")
+        finally:
+            self.closed.emit(self.session_id)
+
+class AuthManager(QObject):
+    """Authentification auprès du backend, hors du thread de l'interface."""
+    authenticated = pyqtSignal(bool)  # Connexion établie ; vrai si le jeton vient du cache
+    failed = pyqtSignal(str, bool)  # Message, identifiants refusés
+    token_refreshed = pyqtSignal()
+    _retry_refresh = pyqtSignal()
+    CACHE_FILE = 'token_cache.json'
+    DEFAULT_LIFETIME = 30 * 60  # Durée supposée d'un jeton sans expiration connue (s)
+    REFRESH_MARGIN = 5 * 60
+    RETRY_DELAY = 60
+
+    def __init__(self, client, parent=None):
+        super().__init__(parent)
+        self.client = client
+        self.username = None
+        self.password = None
+        self.expires_at = 0.0
+        self._lock = threading.Lock()  # Une seule demande de jeton à la fois
+        self._pending = False
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.authenticated.connect(self.schedule_refresh)
+        self.token_refreshed.connect(self.schedule_refresh)
+        self._retry_refresh.connect(self.schedule_refresh)
+        client.on_unauthorized = self.reauthenticate
+
+    def set_credentials(self, username, password):
+        if username != self.username:
+            self.expires_at = 0.0
+        self.username = username
+        self.password = password
+
+    def restore(self):
+        """Reprendre le jeton en cache s'il appartient au même compte et reste valide assez longtemps."""
+        try:
+            with open(get_config_path(self.CACHE_FILE), 'r') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if cache.get('username') != self.username or cache.get('backend_url') != self.client.base_url:
+            return False
+        if cache.get('expires_at', 0) - self.REFRESH_MARGIN <= time.time():
+            return False
+        self.client.token = cache['access_token']
+        self.expires_at = cache['expires_at']
+        self.authenticated.emit(True)
+        return True
+
+    def login(self, username=None, password=None):
+        """Demander un jeton en arrière-plan ; le résultat arrive par `authenticated` ou `failed`."""
+        if username is not None:
+            self.set_credentials(username, password)
+        if self._pending:
+            return
+        self._pending = True
+        threading.Thread(target=self._login_worker, args=(False,), daemon=True).start()
+
+    def refresh(self):
+        if not self.password or self._pending:
+            return
+        self._pending = True
+        threading.Thread(target=self._login_worker, args=(True,), daemon=True).start()
+
+    def schedule_refresh(self, *args):
+        delay = self.expires_at - self.REFRESH_MARGIN - time.time()
+        self.refresh_timer.start(int(max(self.RETRY_DELAY, delay) * 1000))
+
+    def _login_worker(self, refresh):
+        try:
+            self.request_token()
+        except BackendError as e:
+            if refresh:
+                # Le jeton actuel reste utilisable : nouvel essai un peu plus tard
+                print(f"Renouvellement du jeton impossible : {e}")
+                if e.status not in (400, 401):
+                    self._retry_refresh.emit()
+            else:
+                self.failed.emit(str(e), e.status in (400, 401))
+        else:
+            if refresh:
+                self.token_refreshed.emit()
+            else:
+                self.authenticated.emit(False)
+        finally:
+            self._pending = False
+
+    def reauthenticate(self, rejected_header):
+        """Appelé par BackendClient sur un 401, depuis n'importe quel thread. Retourne le nouveau jeton."""
+        if not self.password:
+            return None
+        with self._lock:
+            if self.client.token and f'Bearer {self.client.token}' != rejected_header:
+                return self.client.token  # Déjà renouvelé par un autre thread
+            try:
+                token = self._request_token_locked()
+            except BackendError as e:
+                print(f"Reconnexion après 401 impossible : {e}")
+                return None
+        self.token_refreshed.emit()
+        return token
+
+    def request_token(self):
+        with self._lock:
+            return self._request_token_locked()
+
+    def _request_token_locked(self):
+        try:
+            response = self.client.post(
+                "/token/",
+                endpoint='token',
+                auth=False,
+                data={"username": self.username, "password": self.password}
+            )
+        except requests.RequestException as e:
+            raise BackendError(str(e)) from e
+        if response.status_code != 200:
+            if response.status_code in (400, 401):
+                self.clear_cache()
+            raise BackendError(f"Erreur de l'API : {response.status_code}", response.status_code)
+        payload = response.json()
+        token = payload.get('access_token')
+        if not token:
+            raise BackendError("Réponse sans jeton d'accès")
+        self.client.token = token
+        self.expires_at = self.token_expiry(payload)
+        self.save_cache()
+        return token
+
+    def token_expiry(self, payload):
+        """Expiration du jeton : expires_in de la réponse, sinon la revendication exp du JWT."""
+        if payload.get('expires_in'):
+            return time.time() + float(payload['expires_in'])
+        try:
+            claims = payload['access_token'].split('.')[1]
+            claims = json.loads(base64.urlsafe_b64decode(claims + '=' * (-len(claims) % 4)))
+            return float(claims['exp'])
+        except Exception:
+            return time.time() + self.DEFAULT_LIFETIME
+
+    def save_cache(self):
+        try:
+            with open(get_config_path(self.CACHE_FILE), 'w') as f:
+                json.dump({
+                    'username': self.username,
+                    'backend_url': self.client.base_url,
+                    'access_token': self.client.token,
+                    'expires_at': self.expires_at,
+                }, f, indent=4)
+        except Exception as e:
+            print(f"Impossible d'enregistrer le jeton : {e}")
+
+    def clear_cache(self):
+        try:
+            os.remove(get_config_path(self.CACHE_FILE))
+        except OSError:
+            pass
+
+class AutoShareJob(QThread):
+    """Partage AutoShare d'un téléchargement, hors du thread de l'interface."""
+    user_shared = pyqtSignal(int, int, str)  # ID de téléchargement, ID utilisateur, erreur ('' si succès)
+    completed = pyqtSignal(int, int, int)  # ID de téléchargement, réussites, échecs
+
+    def __init__(self, backend, upload_id, shares, max_workers=4):
+        super().__init__()
+        self.backend = backend
+        self.upload_id = upload_id
+        self.shares = shares  # [(user_id, access_type)]
+        self.max_workers = max_workers
+
+    def run(self):
+        def report(user_id, error):
+            self.user_shared.emit(self.upload_id, user_id, str(error) if error else '')
+
+        try:
+            results = self.backend.share_many(self.upload_id, self.shares, report, self.max_workers)
+        except Exception as e:
+            print(f"Erreur lors du partage AutoShare : {e}")
+            results = {user_id: e for user_id, _ in self.shares}
+        failed = sum(1 for error in results.values() if error)
+        self.completed.emit(self.upload_id, len(results) - failed, failed)
+
+class TextInjector(QObject):
+    """Collage ordonné des transcriptions dans l'application active, sans bloquer l'interface."""
+    pasted = pyqtSignal(str, int, bool)  # Session, numéro du segment collé, segment final
+
+    def __init__(self, parent=None, partial_delay_ms=200, final_delay_ms=500, settle_ms=300):
+        super().__init__(parent)
+        self.partial_delay_ms = partial_delay_ms
+        self.final_delay_ms = final_delay_ms
+        self.settle_ms = settle_ms  # Laisser l'application cible lire le presse-papiers
+        self._pending = {}  # (ordre de la session, numéro du segment) -> (texte, final)
+        self._sessions = []  # Identifiants des sessions, dans l'ordre de démarrage
+        self._order = {}  # Identifiant -> ordre
+        self._closed = set()  # Ordres des sessions qui n'enverront plus rien
+        self._next = (0, 0)
+        self._busy = False
+        self._saved_clipboard = None
+
+    def begin_session(self, session_id):
+        """Nouvelle session : collée après toutes celles démarrées avant elle."""
+        self._order[session_id] = len(self._sessions)
+        self._sessions.append(session_id)
+        self._pump()
+
+    def close_session(self, session_id):
+        """Plus aucun segment n'arrivera : la session suivante n'attend pas un segment final absent."""
+        order = self._order.pop(session_id, None)
+        if order is not None:
+            self._closed.add(order)
+            self._pump()
+
+    def enqueue(self, session_id, chunk_number, text, is_final=False):
+        order = self._order.get(session_id)
+        if order is None:
+            return  # Session inconnue ou déjà close
+        self._pending[(order, chunk_number)] = (text, is_final)
+        self._pump()
+
+    def _advance(self):
+        """Prochain segment à coller, ou None s'il n'est pas encore arrivé."""
+        while True:
+            if self._next in self._pending:
+                return self._next
+            order = self._next[0]
+            if order not in self._closed:
+                return None
+            # Session close : coller ce qui reste (segments manquants sautés), puis passer à la suivante
+            remaining = sorted(key for key in self._pending if key[0] == order)
+            if remaining:
+                self._next = remaining[0]
+            elif order + 1 < len(self._sessions):
+                self._closed.discard(order)
+                self._next = (order + 1, 0)
+            else:
+                return None
+
+    def _pump(self):
+        if self._busy:
+            return
+        while self._advance() is not None:
+            key = self._next
+            text, is_final = self._pending.pop(key)
+            order, chunk_number = key
+            session_id = self._sessions[order]
+            self._next = (order + 1, 0) if is_final else (order, chunk_number + 1)
+            if is_final:
+                self._order.pop(session_id, None)
+            if not text:
+                continue
+
+            self._busy = True
+            try:
+                if self._saved_clipboard is None:
+                    self._saved_clipboard = pyperclip.paste()
+                pyperclip.copy(text)
+            except Exception as e:
+                print(f"Erreur d'accès au presse-papiers : {e}")
+            delay = self.final_delay_ms if is_final else self.partial_delay_ms
+            QTimer.singleShot(delay, lambda: self._send_paste(session_id, chunk_number, is_final))
+            return
+        self._restore_clipboard()
+
+    def _send_paste(self, session_id, chunk_number, is_final):
+        try:
+            keyboard.send('ctrl+v')
+            self.pasted.emit(session_id, chunk_number, is_final)
+        except Exception as e:
+            print(f"Erreur lors du collage du segment {chunk_number} : {e}")
+        QTimer.singleShot(self.settle_ms, self._paste_done)
+
+    def _paste_done(self):
+        self._busy = False
+        self._pump()
 
-        layout.addLayout(form_layout)
+    def _restore_clipboard(self):
+        saved, self._saved_clipboard = self._saved_clipboard, None
+        if saved:  # Contenu non textuel (paste() vide) : ne pas l'écraser
+            try:
+                pyperclip.copy(saved)
+            except Exception as e:
+                print(f"Impossible de restaurer le presse-papiers : {e}")
 
-        # Boutons
-        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        button_box.accepted.connect(self.accept)
-        button_box.rejected.connect(self.reject)
-        button_box.setStyleSheet("""
-            QPushButton {
-                min-width: 80px;
-                min-height: 30px;
-                border-radius: 5px;
-                font-size: 14px;
-            }
-            QPushButton[text="OK"] {
-                background-color: #4a90e2;
-                color: white;
-                border: none;
-            }
-            QPushButton[text="OK"]:hover {
-                background-color: #357abd;
-            }
-            QPushButton[text="Cancel"] {
-                background-color: #e0e0e0;
-                border: none;
-            }
-            QPushButton[text="Cancel"]:hover {
-                background-color: #cccccc;
-            }
-        """)
-        layout.addWidget(button_box)
+class DictationSession:
+    """Une dictée et son état : RECORDING -> FINALIZING -> DONE ou FAILED."""
+    RECORDING = 'recording'
+    FINALIZING = 'finalizing'
+    DONE = 'done'
+    FAILED = 'failed'
 
-        self.setLayout(layout)
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.session_id = recorder.session_id
+        self.state = self.RECORDING
+        self.upload_id = None
+        self.errors = []
+        self.stopped_ticks = 0  # Contrôles consécutifs où le thread ne tournait plus
 
-    def get_backend_url(self):
-        return self.backend_input.text()
+class SessionManager(QObject):
+    """Sessions de dictée concurrentes : une en enregistrement, d'autres en finalisation."""
+    transcription_update = pyqtSignal(str, str, int)  # Session, texte, numéro du segment
+    transcribed = pyqtSignal(str, str, int, int)  # Session, texte final, ID de téléchargement, numéro du segment
+    error = pyqtSignal(str, str)  # Session, message
+    state_changed = pyqtSignal(str, str)  # Session, nouvel état
+    stop_latency = pyqtSignal(float)
+    session_deferred = pyqtSignal(str)
+    WATCHDOG_MS = 1000
 
-class AutoShareDialog(QDialog):
-    def __init__(self, parent=None, users=None, current_configs=None):
+    def __init__(self, recorder_factory, injector, parent=None):
         super().__init__(parent)
-        self.setWindowTitle("Configuration AutoShare")
-        self.setMinimumWidth(600)
-        self.setStyleSheet("""
-            QDialog {
-                background-color: #f5f6fa;
-            }
-            QListWidget {
-                border: 2px solid #e0e0e0;
-                border-radius: 8px;
-                padding: 5px;
-            }
-            QListWidget::item {
-                padding: 8px;
-                border-radius: 4px;
-            }
-            QListWidget::item:selected {
-                background-color: #4a90e2;
-                color: white;
-            }
-            QComboBox {
-                padding: 8px;
-                border: 2px solid #e0e0e0;
-                border-radius: 8px;
-                min-height: 40px;
-            }
-        """)
-        
-        self.users = users if users else []
-        self.current_configs = current_configs if current_configs else []
-        self.init_ui()
+        self.recorder_factory = recorder_factory  # f() -> RecorderThread
+        self.injector = injector
+        self.sessions = {}  # Identifiant -> DictationSession (en cours ou en finalisation)
+        self.active = None  # Session en enregistrement
+        # Filet de sécurité : une session dont le thread s'est arrêté sans `closed` ne bloque pas le collage
+        self.watchdog = QTimer(self)
+        self.watchdog.setInterval(self.WATCHDOG_MS)
+        self.watchdog.timeout.connect(self.check_sessions)
 
-    def init_ui(self):
-        layout = QVBoxLayout()
-        layout.setSpacing(20)
-        layout.setContentsMargins(20, 20, 20, 20)
+    @property
+    def finalizing(self):
+        return [session for session in self.sessions.values() if session.state == DictationSession.FINALIZING]
 
-        # Section de la liste des utilisateurs
-        user_frame = ModernQFrame()
-        user_layout = QVBoxLayout(user_frame)
-        user_layout.setSpacing(10)
-        
-        user_label = QLabel("Sélectionnez les utilisateurs pour AutoShare :")
-        user_label.setStyleSheet("font-size: 14px; font-weight: bold;")
-        user_layout.addWidget(user_label)
+    def start(self):
+        """Démarrer une dictée ; les sessions précédentes continuent leur finalisation."""
+        if self.active is not None:
+            return self.active
+        recorder = self.recorder_factory()
+        session = DictationSession(recorder)
+        session_id = session.session_id
+        # Méthodes liées (pas de lambda) : PyQt délivre alors les signaux dans le thread du gestionnaire
+        recorder.transcription_update.connect(functools.partial(self.handle_update, session_id))
+        recorder.finished.connect(functools.partial(self.handle_finished, session_id))
+        recorder.error.connect(functools.partial(self.handle_error, session_id))
+        recorder.stop_latency.connect(self.stop_latency)
+        recorder.session_deferred.connect(self.session_deferred)
+        recorder.closed.connect(self.handle_closed)
+        self.sessions[session_id] = session
+        self.active = session
+        self.injector.begin_session(session_id)
+        recorder.start()
+        self.watchdog.start()
+        self.state_changed.emit(session_id, session.state)
+        return session
 
-        self.user_list = QListWidget()
-        for user in self.users:
-            item = QListWidgetItem(user['username'])
-            item.setData(Qt.UserRole, user['id'])
-            self.user_list.addItem(item)
-        user_layout.addWidget(self.user_list)
-        layout.addWidget(user_frame)
+    def stop(self):
+        """Demander l'arrêt de la dictée en cours, sans attendre sa transcription finale."""
+        session, self.active = self.active, None
+        if session is None:
+            return None
+        session.recorder.request_stop()
+        self.set_state(session, DictationSession.FINALIZING)
+        return session
 
-        # Section du type d'accès
-        access_frame = ModernQFrame()
-        access_layout = QVBoxLayout(access_frame)
-        access_layout.setSpacing(10)
+    def set_state(self, session, state):
+        session.state = state
+        self.state_changed.emit(session.session_id, state)
 
-        access_label = QLabel("Type d'accès :")
-        access_label.setStyleSheet("font-size: 14px; font-weight: bold;")
-        access_layout.addWidget(access_label)
+    def handle_update(self, session_id, text, chunk_number):
+        self.injector.enqueue(session_id, chunk_number, text)
+        self.transcription_update.emit(session_id, text, chunk_number)
 
-        self.access_type_combo = QComboBox()
-        self.access_type_combo.addItems(['viewer', 'editor'])
-        access_layout.addWidget(self.access_type_combo)
-        layout.addWidget(access_frame)
+    def handle_finished(self, session_id, text, upload_id, chunk_number):
+        session = self.sessions.get(session_id)
+        if session:
+            session.upload_id = upload_id
+        self.injector.enqueue(session_id, chunk_number, text, is_final=True)
+        self.transcribed.emit(session_id, text, upload_id, chunk_number)
 
-        # Bouton pour ajouter une configuration
-        add_button = ModernQPushButton("Ajouter une Configuration", "#27ae60")
-        add_button.clicked.connect(self.add_config)
-        layout.addWidget(add_button)
+    def handle_error(self, session_id, message):
+        session = self.sessions.get(session_id)
+        if session:
+            session.errors.append(message)
+        self.error.emit(session_id, message)
 
-        # Section des configurations actuelles
-        config_frame = ModernQFrame()
-        config_layout = QVBoxLayout(config_frame)
-        config_layout.setSpacing(10)
+    def handle_closed(self, session_id):
+        """Dernier signal d'une session : état final, puis libération du thread."""
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return
+        if self.active is session:
+            # Fin de capture inattendue (micro débranché...)
+            self.active = None
+        self.injector.close_session(session_id)
+        # Sans transcription finale (erreur, envoi confié au spool) : FAILED
+        self.set_state(session, DictationSession.DONE if session.upload_id else DictationSession.FAILED)
+        session.recorder.wait()
+        session.recorder.deleteLater()
+        if not self.sessions:
+            self.watchdog.stop()
 
-        config_label = QLabel("Configurations AutoShare Actuelles :")
-        config_label.setStyleSheet("font-size: 14px; font-weight: bold;")
-        config_layout.addWidget(config_label)
+    def check_sessions(self):
+        """Clore les sessions dont le thread ne tourne plus depuis deux contrôles sans avoir émis `closed`."""
+        for session in list(self.sessions.values()):
+            if session.recorder.isRunning():
+                session.stopped_ticks = 0
+                continue
+            # Un contrôle d'écart : les signaux déjà émis par le thread sont traités avant
+            session.stopped_ticks += 1
+            if session.stopped_ticks >= 2:
+                print(f"Session {session.session_id} terminée sans clôture : abandonnée")
+                self.handle_closed(session.session_id)
 
-        self.config_list = QListWidget()
-        self.refresh_config_list()
-        config_layout.addWidget(self.config_list)
-        layout.addWidget(config_frame)
+    def shutdown(self, timeout_ms=5000):
+        """Arrêt de l'application : arrêter la dictée en cours et laisser un délai aux finalisations."""
+        self.stop()
+        deadline = time.monotonic() + timeout_ms / 1000
+        for session in list(self.sessions.values()):
+            session.recorder.wait(max(0, int((deadline - time.monotonic()) * 1000)))
 
-        # Bouton pour supprimer une configuration
-        remove_button = ModernQPushButton("Supprimer la Sélection", "#e74c3c")
-        remove_button.clicked.connect(self.remove_config)
-        layout.addWidget(remove_button)
+AUDIO_FILE_EXTENSIONS = ('.wav', '.flac')
 
-        # Boutons du dialogue
-        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        button_box.accepted.connect(self.accept)
-        button_box.rejected.connect(self.reject)
-        layout.addWidget(button_box)
+def read_audio_blocks(path, block_seconds=1.0):
+    """Ouvrir un fichier WAV ou FLAC : (fréquence, nombre d'échantillons, blocs float32 mono)."""
+    soundfile = load_soundfile()
+    if soundfile is not None:
+        info = soundfile.info(path)
+        blocks = soundfile.blocks(
+            path, blocksize=max(1, int(info.samplerate * block_seconds)), dtype='float32', always_2d=True
+        )
+        return info.samplerate, info.frames, (block.mean(axis=1) for block in blocks)
+    if not path.lower().endswith('.wav'):
+        raise RuntimeError("La lecture des fichiers FLAC nécessite le module soundfile")
+    with wave.open(path, 'rb') as wav_file:
+        samplerate, frames = wav_file.getframerate(), wav_file.getnframes()
+        width, channels = wav_file.getsampwidth(), wav_file.getnchannels()
+    if width not in (1, 2, 4):
+        raise RuntimeError(f"WAV {width * 8} bits non pris en charge sans le module soundfile")
 
-        self.setLayout(layout)
+    def blocks():
+        dtype, offset, scale = {1: (np.uint8, 128, 128.0), 2: (np.int16, 0, 32768.0), 4: (np.int32, 0, 2147483648.0)}[width]
+        with wave.open(path, 'rb') as wav_file:
+            while True:
+                data = wav_file.readframes(max(1, int(samplerate * block_seconds)))
+                if not data:
+                    return
+                samples = np.frombuffer(data, dtype=dtype).reshape(-1, channels)
+                yield ((samples.astype(np.float32) - offset) / scale).mean(axis=1)
 
-    def refresh_config_list(self):
-        self.config_list.clear()
-        for config in self.current_configs:
-            username = next((user['username'] for user in self.users if user['id'] == config['userId']), "Utilisateur Inconnu")
-            item_text = f"{username} - {config['accessType']}"
-            item = QListWidgetItem(item_text)
-            item.setData(Qt.UserRole, config['userId'])
-            self.config_list.addItem(item)
+    return samplerate, frames, blocks()
 
-    def add_config(self):
-        selected_items = self.user_list.selectedItems()
-        if not selected_items:
-            QMessageBox.warning(self, "Avertissement", "Veuillez sélectionner un utilisateur")
-            return
+def find_audio_files(patterns):
+    """Fichiers audio désignés par des dossiers, des chemins ou des motifs glob, sans doublon."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [os.path.join(pattern, name) for name in sorted(os.listdir(pattern))]
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for path in matches:
+            if path.lower().endswith(AUDIO_FILE_EXTENSIONS) and os.path.isfile(path):
+                path = os.path.abspath(path)
+                if path not in paths:
+                    paths.append(path)
+    return paths
 
-        user_id = selected_items[0].data(Qt.UserRole)
-        access_type = self.access_type_combo.currentText()
+class BatchTranscriber:
+    """Transcription sans interface de fichiers audio existants, avec reprise."""
+    BLOCK_SECONDS = 1.0
 
-        if any(config['userId'] == user_id for config in self.current_configs):
-            QMessageBox.warning(self, "Avertissement", "Cet utilisateur a déjà une configuration")
-            return
+    def __init__(self, backend, options=None, jobs=4, state_path=None, force=False, metrics=None):
+        # Pas d'abandon de segments : la lecture attend l'envoi (contre-pression)
+        self.options = dict(DEFAULT_RECORDING_OPTIONS, **(options or {}))
+        self.options['overflow_policy'] = 'block'
+        self.backend = backend
+        self.jobs = jobs
+        self.force = force
+        self.metrics = metrics or PipelineMetrics()
+        self.state_path = state_path or get_config_path('batch_state.json')
+        self._state_lock = threading.Lock()
+        self.state = self.load_state()
 
-        self.current_configs.append({
-            'userId': user_id,
-            'accessType': access_type
-        })
-        self.refresh_config_list()
+    def load_state(self):
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
 
-    def remove_config(self):
-        selected_items = self.config_list.selectedItems()
-        if not selected_items:
-            QMessageBox.warning(self, "Avertissement", "Veuillez sélectionner une configuration à supprimer")
-            return
+    def save_state(self):
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.state, f, indent=4)
+        os.replace(temp_path, self.state_path)
 
-        for item in selected_items:
-            user_id = item.data(Qt.UserRole)
-            self.current_configs = [config for config in self.current_configs if config['userId'] != user_id]
-        self.refresh_config_list()
+    @staticmethod
+    def transcript_path(path):
+        return os.path.splitext(path)[0] + '.txt'
 
-    def get_configs(self):
-        return self.current_configs
+    @staticmethod
+    def file_signature(path):
+        stat = os.stat(path)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime}
 
-class RecorderThread(QThread):
-    finished = pyqtSignal(str, int)  # Signal pour le texte final et l'ID de téléchargement
-    error = pyqtSignal(str)
-    transcription_update = pyqtSignal(str)
-    recording_level = pyqtSignal(float)
+    def is_done(self, path):
+        entry = self.state.get(path)
+        if self.force or not entry or not os.path.exists(self.transcript_path(path)):
+            return False
+        signature = self.file_signature(path)
+        return entry['size'] == signature['size'] and entry['mtime'] == signature['mtime']
 
-    def __init__(self, api_url, token):
-        super().__init__()
-        self.api_url = api_url
-        self.token = token
-        self.is_recording = False
-        self.audio_data = []
-        self.chunk_duration = 30  # Durée des segments en secondes
-        self.session_id = str(int(time.time()))
-        self.chunk_number = 0
-        self.selectedUploadId = None  # Ajout de cet attribut
-        # Supprimé self.all_transcriptions
+    def transcribe_file(self, path):
+        """Transcrire un fichier (dans un worker du pool). Retourne son résultat."""
+        started = time.perf_counter()
+        recorder = RecorderThread(self.backend, self.options, metrics=self.metrics)
+        partials = {}
+        final = {}
+        errors = []
+        # Aucune boucle d'événements : les signaux sont reçus dans le thread émetteur
+        recorder.transcription_update.connect(lambda text, chunk_number: partials.__setitem__(chunk_number, text), Qt.DirectConnection)
+        recorder.finished.connect(lambda text, upload_id, chunk_number: final.update(text=text, upload_id=upload_id), Qt.DirectConnection)
+        recorder.error.connect(errors.append, Qt.DirectConnection)
 
-    def process_chunk(self, is_final=False):
-        if len(self.audio_data) > 0:
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
-                audio_concat = np.concatenate(self.audio_data)
-                with wave.open(temp_wav.name, 'wb') as wav_file:
-                    wav_file.setnchannels(1)
-                    wav_file.setsampwidth(2)
-                    wav_file.setframerate(16000)
-                    wav_file.writeframes(audio_concat.tobytes())
+        samplerate, frames, blocks = read_audio_blocks(path, self.BLOCK_SECONDS)
+        resampler = PolyphaseResampler(samplerate, recorder.samplerate)
+        recorder.start_session()
+        try:
+            for block in blocks:
+                samples = resampler.process(block)
+                # Lecture plus rapide que l'envoi : attendre la libération de segments plutôt que perdre de l'audio
+                recorder.ring_buffer.wait_for_space(len(samples))
+                recorder.on_audio(samples)
+        except Exception as e:
+            errors.append(f"Lecture de {path} : {e}")
+        finally:
+            recorder.request_stop()
+            recorder.finish_session()
 
-            try:
-                with open(temp_wav.name, 'rb') as audio_file:
-                    files = {
-                        'file': ('chunk.wav', audio_file, 'audio/wav')
-                    }
-                    data = {
-                        'chunk_number': self.chunk_number,
-                        'session_id': self.session_id,
-                        'is_final': str(is_final).lower(),
-                        'model': 'openai/whisper-large-v3-turbo'
-                    }
-                    headers = {'Authorization': f'Bearer {self.token}'}
-
-                    response = requests.post(
-                        f"{self.api_url}/process-chunk/",
-                        files=files,
-                        data=data,
-                        headers=headers
-                    )
+        if errors or 'text' not in final:
+            raise BackendError(errors[0] if errors else "Transcription finale non reçue")
+        text = final['text'] or ' '.join(partials[number] for number in sorted(partials) if partials[number])
+        temp_path = self.transcript_path(path) + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, self.transcript_path(path))
+        return {
+            'audio_seconds': frames / samplerate,
+            'wall_seconds': time.perf_counter() - started,
+            'upload_id': final['upload_id'],
+            'session_id': recorder.session_id,
+        }
 
-                    if response.status_code == 200:
-                        result = response.json()
-                        if is_final:
-                            final_trans = result.get('transcription', '')
-                            self.selectedUploadId = result.get('upload_id', None)
-                            if final_trans and self.selectedUploadId:
-                                self.finished.emit(final_trans, self.selectedUploadId)
-                        else:
-                            chunk_trans = result.get('chunk_transcription', '')
-                            if chunk_trans:
-                                # Émettre uniquement le chunk actuel
-                                self.transcription_update.emit(chunk_trans)
-                    else:
-                        self.error.emit(f"Erreur de l'API : {response.status_code}")
+    def run(self, paths):
+        """Transcrire `paths` ; retourne le bilan (fichiers, durée audio, débit)."""
+        started = time.perf_counter()
+        summary = {'files': len(paths), 'done': 0, 'skipped': 0, 'failed': 0, 'audio_seconds': 0.0}
+        pending = []
+        for path in paths:
+            if self.is_done(path):
+                summary['skipped'] += 1
+                print(f"Déjà transcrit : {path}")
+            else:
+                pending.append(path)
 
-            except Exception as e:
-                self.error.emit(f"Erreur lors de l'envoi du segment : {str(e)}")
-            finally:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix='batch') as executor:
+            futures = {executor.submit(self.transcribe_file, path): path for path in pending}
+            for future in concurrent.futures.as_completed(futures):
+                path = futures[future]
                 try:
-                    os.unlink(temp_wav.name)
+                    result = future.result()
                 except Exception as e:
-                    print(f"Impossible de supprimer le fichier temporaire {temp_wav.name} : {e}")
+                    summary['failed'] += 1
+                    print(f"Échec : {path} : {e}")
+                    result = None
+                else:
+                    summary['done'] += 1
+                    summary['audio_seconds'] += result['audio_seconds']
+                    print(
+                        f"Transcrit : {path} ({result['audio_seconds']:.0f} s d'audio "
+                        f"en {result['wall_seconds']:.1f} s, téléchargement {result['upload_id']})"
+                    )
+                with self._state_lock:
+                    if result:
+                        self.state[path] = dict(self.file_signature(path), **result)
+                    else:
+                        self.state.pop(path, None)  # À reprendre, même si une ancienne transcription existe
+                    try:
+                        self.save_state()
+                    except OSError as e:
+                        print(f"Impossible d'enregistrer l'état du traitement : {e}")
 
-        self.audio_data = []
-        self.chunk_number += 1
+        summary['wall_seconds'] = time.perf_counter() - started
+        summary['audio_hours_per_hour'] = summary['audio_seconds'] / max(summary['wall_seconds'], 1e-9)
+        return summary
 
-    def run(self):
-        try:
-            samplerate = 16000
-            channels = 1
-            dtype = np.int16
-            samples_per_chunk = samplerate * self.chunk_duration
-            current_samples = 0
-
-            def audio_callback(indata, frames, time_info, status):
-                nonlocal current_samples
-                if self.is_recording:
-                    self.audio_data.append(indata.copy())
-                    current_samples += frames
-
-                    # Calculer le niveau audio
-                    if len(indata) > 0:
-                        audio_level = np.max(np.abs(indata)) / 32768.0
-                        self.recording_level.emit(audio_level)
-
-                    if current_samples >= samples_per_chunk:
-                        self.process_chunk(False)
-                        current_samples = 0
-
-            with sd.InputStream(
-                samplerate=samplerate,
-                channels=channels,
-                dtype=dtype,
-                callback=audio_callback
-            ):
-                self.is_recording = True
-                while self.is_recording:
-                    sd.sleep(100)
-
-                # Traitement final
-                if self.audio_data:
-                    self.process_chunk(True)
+def run_batch(args):
+    """Point d'entrée --batch : transcription des fichiers sans interface."""
+    app = QCoreApplication(sys.argv)  # Même répertoire de configuration que l'application
+    try:
+        config = read_config()
+    except Exception as e:
+        print(f"Erreur lors du chargement des paramètres : {e}")
+        return 1
+    options = validate_recording_options(config.get('recording', {}))
+    client = BackendClient(config.get('backend_url', DEFAULT_BACKEND_URL))
+    backend = create_transcription_backend(options, client)
+    if isinstance(backend, HttpTranscriptionBackend):
+        auth = AuthManager(client)
+        auth.set_credentials(config.get('username', ''), config.get('password', ''))
+        if not auth.restore():
+            try:
+                auth.request_token()
+            except BackendError as e:
+                print(f"Échec de la connexion : {e}")
+                return 1
 
-        except Exception as e:
-            self.error.emit(str(e))
+    paths = find_audio_files(args.batch)
+    if not paths:
+        print("Aucun fichier WAV ou FLAC trouvé")
+        return 1
+    transcriber = BatchTranscriber(backend, options, jobs=args.jobs, state_path=args.state, force=args.force)
+    summary = transcriber.run(paths)
+    client.close()
+    hours = summary['audio_seconds'] / 3600
+    print(
+        f"{summary['done']} transcrits, {summary['skipped']} déjà faits, {summary['failed']} échecs "
+        f"sur {summary['files']} fichiers : {hours:.2f} h d'audio en {summary['wall_seconds']:.0f} s, "
+        f"soit {summary['audio_hours_per_hour']:.1f} h d'audio par heure"
+    )
+    return 1 if summary['failed'] else 0
 
 class MainWindow(QMainWindow):
+    TEMP_CLEANUP_DELAY_MS = 10000  # Ménage des fichiers temporaires après le lancement
+    hotkey_toggled = pyqtSignal()  # Double F12, émis depuis le thread du hook clavier
+
     def __init__(self):
         super().__init__()
         
         # Initialisations de base
-        self.recorder_thread = None
+        self.sessions = None  # Dictées en cours et en finalisation
         self.current_transcription = ""
         self.is_recording = False
         self.f12_count = 0
         self.last_f12_time = 0
-        self.api_url = "https://backend.shaz.ai"
+        self.api_url = DEFAULT_BACKEND_URL
         self.autoshare_configs = []
+        self.autoshare_jobs = []  # Partages AutoShare en cours
+        self.recording_options = dict(DEFAULT_RECORDING_OPTIONS)
+        self.stop_latencies = collections.deque(maxlen=100)  # Délais arrêt -> texte final (ms)
         self.token = None  # Initialiser l'attribut token
+        self.backend = BackendClient(self.api_url)  # Client HTTP partagé (pool de connexions)
+        self.transcription = None  # Backend de transcription (HTTP par défaut)
+        self.metrics = PipelineMetrics()  # Latences par étape, du scellé au collage
+        self.metrics_server = None
+        self.text_injector = TextInjector(self)  # Collage ordonné et non bloquant
+        self.sessions = SessionManager(self.create_recorder, self.text_injector, self)
+        self.sessions.transcribed.connect(self.handle_transcription)
+        self.sessions.error.connect(self.handle_error)
+        self.sessions.transcription_update.connect(self.handle_transcription_update)
+        self.sessions.stop_latency.connect(self.handle_stop_latency)
+        self.sessions.session_deferred.connect(self.handle_deferred_session)
+        self.sessions.state_changed.connect(self.handle_session_state)
+        self.auth = AuthManager(self.backend, self)  # Jeton en cache, renouvelé en arrière-plan
+        self.auth.authenticated.connect(self.handle_authenticated)
+        self.auth.failed.connect(self.handle_login_failed)
+        self.interactive_login = False
+        self.user_directory = None  # Annuaire des utilisateurs pour AutoShare, chargé avec la configuration
+        self.spool = None
+        self.spool_drainer = None
+        self.session_store = None
+        self.capture_engine = None
 
         # Créer et configurer l'icône de la barre des tâches avant tout
         self.setup_tray()
@@ -465,11 +3429,90 @@ class MainWindow(QMainWindow):
         self.init_ui()
         
         # Charger les configurations et autres configurations
-        self.cleanup_temp_files()
         self.load_config()
+        self.user_directory = UserDirectory(self.backend.base_url, self)
+        self.user_directory.sync_failed.connect(self.handle_users_sync_failed)
         self.load_autoshare_configs()
+        self.transcription = create_transcription_backend(self.recording_options, self.backend)
+        self.setup_metrics()
         self.setup_menu_bar()
+
+        # Le reste attend que la fenêtre et l'icône soient affichées
+        QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """Deuxième phase du lancement, une fois la boucle d'événements démarrée."""
+        STARTUP.mark('interactive')
+        self.setup_spool()
+        self.setup_session_store()
+        self.setup_capture_engine()
         self.setup_global_hotkey()
+        self.start_authentication()
+        STARTUP.mark('background_ready')
+        # Ménage des fichiers temporaires en période creuse, hors du thread de l'interface
+        QTimer.singleShot(self.TEMP_CLEANUP_DELAY_MS, lambda: threading.Thread(
+            target=self.cleanup_temp_files, daemon=True
+        ).start())
+
+    def setup_metrics(self):
+        self.metrics.export_path = self.recording_options['metrics_file']
+        self.transcription.metrics = self.metrics
+        self.text_injector.pasted.connect(self.handle_pasted)
+        port = self.recording_options['metrics_port']
+        if port:
+            try:
+                self.metrics_server = MetricsServer(self.metrics, int(port))
+            except Exception as e:
+                print(f"Point d'accès des mesures indisponible sur le port {port} : {e}")
+
+    def handle_pasted(self, session_id, chunk_number, is_final):
+        self.metrics.mark(session_id, chunk_number, 'pasted')
+        if is_final:
+            self.metrics.flush()
+
+    def setup_session_store(self):
+        if not self.recording_options['session_store']:
+            return
+        try:
+            self.session_store = SessionAudioStore(
+                get_data_directory('sessions'),
+                max_sessions=self.recording_options['session_store_max_sessions']
+            )
+        except Exception as e:
+            print(f"Magasin de sessions indisponible : {e}")
+
+    def setup_capture_engine(self):
+        """Micro maintenu ouvert : ouverture en arrière-plan pour ne pas figer l'interface."""
+        if not self.recording_options['warm_microphone']:
+            return
+        self.capture_engine = CaptureEngine(
+            preroll_ms=self.recording_options['preroll_ms'],
+            input_samplerate=self.recording_options['input_samplerate']
+        )
+        threading.Thread(target=self.open_capture_engine, daemon=True).start()
+
+    def open_capture_engine(self):
+        try:
+            self.capture_engine.start()
+        except Exception as e:
+            # Sans micro ouvert, chaque dictée ouvre le sien comme avant
+            print(f"Impossible d'ouvrir le micro en continu : {e}")
+
+    def setup_spool(self):
+        """Reprendre les sessions non acquittées lors d'un lancement précédent."""
+        if not self.recording_options['spool_enabled']:
+            return
+        try:
+            self.spool = ChunkSpool(
+                get_data_directory('spool'),
+                max_bytes=self.recording_options['spool_max_mb'] * 1024 * 1024
+            )
+        except Exception as e:
+            print(f"Spool indisponible : {e}")
+            return
+        self.spool_drainer = SpoolDrainer(self.spool, self.transcription)
+        self.spool_drainer.session_recovered.connect(self.handle_recovered_session)
+        self.spool_drainer.start()
 
     def setup_tray(self):
         """Configurer l'icône de la barre des tâches et le menu"""
@@ -602,6 +3645,15 @@ class MainWindow(QMainWindow):
         """Quitter proprement l'application"""
         self.save_config()
         self.save_autoshare_configs()
+        self.sessions.shutdown()
+        if self.spool_drainer:
+            self.spool_drainer.stop()
+        if self.capture_engine:
+            self.capture_engine.stop()
+        if self.metrics_server:
+            self.metrics_server.close()
+        self.metrics.flush()
+        self.backend.close()
         QApplication.quit()
 
     def tray_icon_activated(self, reason):
@@ -686,9 +3738,12 @@ class MainWindow(QMainWindow):
         self.status_label.setAlignment(Qt.AlignCenter)
         recording_layout.addWidget(self.status_label)
 
-        # Barre de progression du niveau audio
+        # Barre de progression du niveau audio, rafraîchie à cadence fixe pendant l'enregistrement
         self.level_bar = ModernQProgressBar()
         recording_layout.addWidget(self.level_bar)
+        self.level_timer = QTimer(self)
+        self.level_timer.setInterval(1000 // LevelMeter.UI_RATE_HZ)
+        self.level_timer.timeout.connect(self.refresh_level_bar)
 
         parent_layout.addWidget(recording_frame)
 
@@ -735,6 +3790,8 @@ class MainWindow(QMainWindow):
         settings_menu.addAction(backend_action)
 
     def setup_global_hotkey(self):
+        # Le hook clavier tourne dans son propre thread : bascule via un signal vers le thread de l'interface
+        self.hotkey_toggled.connect(self.toggle_recording)
         keyboard.on_press_key("F12", self.handle_f12)
 
     def handle_f12(self, event):
@@ -748,7 +3805,7 @@ class MainWindow(QMainWindow):
 
         if self.f12_count == 2:
             self.f12_count = 0
-            self.toggle_recording()
+            self.hotkey_toggled.emit()
 
     def toggle_recording(self):
         if not self.token:
@@ -760,27 +3817,55 @@ class MainWindow(QMainWindow):
         else:
             self.stop_recording()
 
+    def create_recorder(self):
+        return RecorderThread(
+            self.transcription,
+            self.recording_options,
+            spool=self.spool,
+            session_store=self.session_store,
+            capture=self.capture_engine,
+            metrics=self.metrics
+        )
+
     def start_recording(self):
+        # Les dictées précédentes peuvent encore être en finalisation : pas d'attente
         self.is_recording = True
         self.update_recording_status(True)
         self.update_status("Enregistrement en cours...", "recording")
-        self.recorder_thread = RecorderThread(self.api_url, self.token)
-        self.recorder_thread.finished.connect(self.handle_transcription)
-        self.recorder_thread.error.connect(self.handle_error)
-        self.recorder_thread.transcription_update.connect(self.handle_transcription_update)
-        self.recorder_thread.recording_level.connect(self.update_level_bar)
-        self.recorder_thread.start()
+        self.sessions.start()
 
     def stop_recording(self):
-        if self.recorder_thread:
-            self.is_recording = False
-            self.recorder_thread.is_recording = False
-            self.update_recording_status(False)
-            self.update_status("Traitement...", "processing")
+        self.sessions.stop()
+        self.is_recording = False
+        self.update_recording_status(False)
+        self.update_status("Traitement...", "processing")
+
+    def is_background_session(self, session_id):
+        """Vrai pour une dictée précédente qui se finalise pendant qu'une autre enregistre."""
+        active = self.sessions.active
+        return active is not None and active.session_id != session_id
+
+    def handle_session_state(self, session_id, state):
+        if self.is_recording and self.sessions.active is None:
+            # La dictée en cours s'est terminée d'elle-même (erreur de capture)
+            self.stop_recording()
+        # Vumètre piloté ici : ce slot s'exécute toujours dans le thread de l'interface
+        if self.sessions.active is not None:
+            if not self.level_timer.isActive():
+                self.level_timer.start()
+        elif self.level_timer.isActive():
+            self.level_timer.stop()
             self.level_bar.setValue(0)
 
+    def refresh_level_bar(self):
+        """Lecture périodique du vumètre de l'enregistreur (QTimer à LevelMeter.UI_RATE_HZ)."""
+        if self.sessions.active:
+            self.update_level_bar(self.sessions.active.recorder.level_meter.peak)
+
     def update_level_bar(self, level):
-        self.level_bar.setValue(int(level * 100))
+        value = min(100, int(level * 100))
+        if value != self.level_bar.value():
+            self.level_bar.setValue(value)
 
     def update_status(self, message, status_type="normal"):
         self.status_label.setText(message)
@@ -820,34 +3905,76 @@ class MainWindow(QMainWindow):
                 border-radius: 5px;
             """)
 
-    def handle_transcription_update(self, transcription):
-        # Mettre à jour uniquement avec le nouveau chunk
-        self.current_transcription = transcription
-        time.sleep(0.2)
-        pyperclip.copy(transcription)
-        keyboard.send('ctrl+v')
-        self.update_status("Mise à jour de la transcription...", "processing")
+    def handle_transcription_update(self, session_id, transcription, chunk_number):
+        # Le collage est confié à l'injecteur (via le gestionnaire de sessions), qui respecte l'ordre
+        if transcription:
+            # Mettre à jour uniquement avec le nouveau chunk
+            self.current_transcription = transcription
+            if not self.is_background_session(session_id):
+                self.update_status("Mise à jour de la transcription...", "processing")
 
-    def handle_transcription(self, transcription, upload_id):
+    def handle_transcription(self, session_id, transcription, upload_id, chunk_number):
         # Assurez-vous que la transcription finale ne contient que le texte final
         self.current_transcription = transcription
-        time.sleep(0.5)
-
-        pyperclip.copy(transcription)
-        keyboard.send('ctrl+v')
-        self.update_status("Transcription terminée", "normal")
+        if not self.is_background_session(session_id):
+            self.update_status("Transcription terminée", "normal")
 
         self.show_notification("Transcription terminée", "Le texte final a été copié")
 
+        self.autoshare_upload(upload_id)
+
+    def autoshare_upload(self, upload_id):
+        """Lancer le partage AutoShare en arrière-plan : l'interface reste disponible."""
         self.selectedUploadId = upload_id
-        if self.autoshare_configs:
-            for config in self.autoshare_configs:
-                self.share_with_user(config['userId'], config['accessType'])
+        if not self.autoshare_configs or not upload_id:
+            return
+        shares = [(config['userId'], config['accessType']) for config in self.autoshare_configs]
+        job = AutoShareJob(self.transcription, upload_id, shares)
+        job.user_shared.connect(self.handle_user_shared)
+        job.completed.connect(self.handle_autoshare_completed)
+        job.finished.connect(lambda: self.autoshare_jobs.remove(job))
+        self.autoshare_jobs.append(job)  # Garder une référence jusqu'à la fin du thread
+        job.start()
+
+    def handle_user_shared(self, upload_id, user_id, error):
+        if error:
+            print(f"Erreur lors du partage avec l'utilisateur ID {user_id} : {error}")
+
+    def handle_autoshare_completed(self, upload_id, succeeded, failed):
+        if failed:
+            self.show_notification(
+                "AutoShare",
+                f"Partage incomplet : {failed} échec(s) sur {succeeded + failed} utilisateur(s)"
+            )
+            self.update_status(f"AutoShare : {failed} partage(s) en échec", "error")
+
+    def handle_deferred_session(self, session_id):
+        self.update_status("Envoi différé : la dictée sera transmise dès que possible", "error")
+        self.show_notification(
+            "Envoi différé",
+            "Le backend est injoignable : la dictée est conservée et sera envoyée automatiquement"
+        )
+        if self.spool_drainer:
+            self.spool_drainer.wake()
+
+    def handle_recovered_session(self, session_id, transcription, upload_id):
+        """Session du spool finalisée en arrière-plan : notifier et appliquer AutoShare."""
+        self.show_notification("Dictée récupérée", "Une dictée en attente a été transcrite et enregistrée")
+        self.autoshare_upload(upload_id)
+
+    def handle_stop_latency(self, latency_ms):
+        """Suivre le délai entre l'arrêt demandé et la réception du texte final."""
+        self.stop_latencies.append(latency_ms)
+        median = sorted(self.stop_latencies)[len(self.stop_latencies) // 2]
+        print(f"Délai arrêt -> texte : {latency_ms:.0f} ms (médiane {median:.0f} ms sur {len(self.stop_latencies)})")
+        if not self.is_recording:
+            self.update_status(f"Transcription terminée ({latency_ms / 1000:.1f} s après l'arrêt)", "normal")
 
-    def handle_error(self, error_msg):
+    def handle_error(self, session_id, error_msg):
         self.show_error_message(error_msg)
-        self.update_status("Une erreur est survenue", "error")
-        self.level_bar.setValue(0)
+        if not self.is_background_session(session_id):
+            self.update_status("Une erreur est survenue", "error")
+            self.level_bar.setValue(0)
 
     def open_backend_dialog(self):
         dialog = SettingsDialog(self, current_backend=self.api_url)
@@ -855,6 +3982,7 @@ class MainWindow(QMainWindow):
             new_url = dialog.get_backend_url().strip()
             if new_url:
                 self.api_url = new_url
+                self.backend.base_url = new_url
                 self.save_config()
                 QMessageBox.information(self, "Succès", "URL du Backend mise à jour avec succès")
 
@@ -872,45 +4000,66 @@ class MainWindow(QMainWindow):
             self.show_error_message("Veuillez remplir tous les champs")
             return
 
-        try:
-            response = requests.post(
-                f"{self.api_url}/token/",
-                data={"username": username, "password": password}
-            )
+        # Demande du jeton en arrière-plan : l'interface reste disponible
+        self.interactive_login = True
+        self.login_button.setEnabled(False)
+        self.update_status("Connexion...", "processing")
+        self.auth.login(username, password)
 
-            if response.status_code == 200:
-                self.token = response.json().get('access_token')
-                self.save_config()
-                self.update_status("Connexion réussie", "normal")
-                self.login_button.setEnabled(False)
-                self.username_input.setEnabled(False)
-                self.password_input.setEnabled(False)
-                self.autoshare_button.setEnabled(True)
-                self.fetch_users()
-                self.update_autoshare_status()
-            else:
-                self.show_error_message("Nom d'utilisateur ou mot de passe invalide")
+    def start_authentication(self):
+        """Au lancement : jeton en cache, sinon connexion en arrière-plan avec les identifiants enregistrés."""
+        username = self.username_input.text()
+        password = self.password_input.text()
+        if not username:
+            return
+        self.auth.set_credentials(username, password)
+        if not self.auth.restore() and password:
+            self.update_status("Connexion...", "processing")
+            self.auth.login()
 
-        except Exception as e:
-            self.show_error_message(f"Erreur de connexion : {str(e)}")
+    def handle_authenticated(self, from_cache):
+        self.token = self.backend.token
+        if self.interactive_login:
+            self.save_config()
+        self.interactive_login = False
+        self.update_status("Connexion réussie", "normal")
+        self.login_button.setEnabled(False)
+        self.username_input.setEnabled(False)
+        self.password_input.setEnabled(False)
+        self.autoshare_button.setEnabled(True)
+        self.fetch_users()
+        self.update_autoshare_status()
+        if self.spool_drainer:
+            self.spool_drainer.wake()
+
+    def handle_login_failed(self, message, rejected):
+        self.login_button.setEnabled(True)
+        if not self.interactive_login:
+            # Connexion automatique au lancement : pas de fenêtre d'erreur
+            self.update_status("Connexion automatique impossible", "error")
+            return
+        self.interactive_login = False
+        self.update_status("Non connecté", "error")
+        if rejected:
+            self.show_error_message("Nom d'utilisateur ou mot de passe invalide")
+        else:
+            self.show_error_message(f"Erreur de connexion : {message}")
 
     def fetch_users(self):
-        try:
-            headers = {'Authorization': f'Bearer {self.token}'}
-            response = requests.get(f"{self.api_url}/users/", headers=headers)
-            if response.status_code == 200:
-                self.users = response.json().get('users', [])
-            else:
-                self.show_error_message("Échec de la récupération des utilisateurs")
-        except Exception as e:
-            self.show_error_message(f"Erreur lors de la récupération des utilisateurs : {str(e)}")
+        """Synchroniser l'annuaire en arrière-plan ; la copie locale reste utilisable entre-temps."""
+        self.user_directory.sync(self.backend)
+
+    def handle_users_sync_failed(self, message):
+        print(f"Erreur lors de la récupération des utilisateurs : {message}")
+        if not len(self.user_directory):
+            self.show_error_message("Échec de la récupération des utilisateurs")
 
     def open_autoshare_dialog(self):
-        if not hasattr(self, 'users') or not self.users:
+        if not self.token or not len(self.user_directory):
             self.show_error_message("Veuillez vous connecter d'abord pour configurer AutoShare")
             return
 
-        dialog = AutoShareDialog(self, users=self.users, current_configs=self.autoshare_configs.copy())
+        dialog = AutoShareDialog(self, directory=self.user_directory, current_configs=self.autoshare_configs.copy())
         if dialog.exec_() == QDialog.Accepted:
             self.autoshare_configs = dialog.get_configs()
             self.save_autoshare_configs()
@@ -940,23 +4089,23 @@ class MainWindow(QMainWindow):
             """)
 
     def load_config(self):
-        config_path = get_config_path('config.json')
-        if os.path.exists(config_path):
-            try:
-                with open(config_path, 'r') as f:
-                    config = json.load(f)
-                    self.username_input.setText(config.get('username', ''))
-                    self.password_input.setText(config.get('password', ''))
-                    self.api_url = config.get('backend_url', self.api_url)
-            except Exception as e:
-                print(f"Erreur lors du chargement des paramètres : {e}")
+        try:
+            config = read_config()
+            self.username_input.setText(config.get('username', ''))
+            self.password_input.setText(config.get('password', ''))
+            self.api_url = config.get('backend_url', self.api_url)
+            self.backend.base_url = self.api_url
+            self.recording_options = validate_recording_options(config.get('recording', {}))
+        except Exception as e:
+            print(f"Erreur lors du chargement des paramètres : {e}")
 
     def save_config(self):
         try:
             config = {
                 'username': self.username_input.text(),
                 'password': self.password_input.text(),
-                'backend_url': self.api_url
+                'backend_url': self.api_url,
+                'recording': self.recording_options
             }
             config_path = get_config_path('config.json')
             with open(config_path, 'w') as f:
@@ -981,38 +4130,16 @@ class MainWindow(QMainWindow):
         except Exception as e:
             print(f"Erreur lors de la sauvegarde des configurations AutoShare : {e}")
 
-    def share_with_user(self, user_id, access_type):
-        if not hasattr(self, 'selectedUploadId') or not self.selectedUploadId:
-            self.show_error_message("Aucune transcription à partager")
-            return
-
-        try:
-            headers = {'Authorization': f'Bearer {self.token}'}
-            payload = {
-                'user_id': user_id,
-                'access_type': access_type
-            }
-            response = requests.post(
-                f"{self.api_url}/share/{self.selectedUploadId}/user/",
-                json=payload,
-                headers=headers
-            )
-            
-            if response.status_code not in [200, 201]:
-                self.show_error_message(f"Échec du partage avec l'utilisateur ID {user_id}")
-                
-        except Exception as e:
-            print(f"Erreur lors du partage avec l'utilisateur ID {user_id} : {e}")
-
     def cleanup_temp_files(self):
-        temp_dir = tempfile.gettempdir()
+        """Vider le répertoire temporaire de l'application (jamais celui du système)."""
+        temp_dir = get_temp_directory()
         for filename in os.listdir(temp_dir):
-            if filename.endswith('.wav'):
-                try:
-                    file_path = os.path.join(temp_dir, filename)
+            file_path = os.path.join(temp_dir, filename)
+            try:
+                if os.path.isfile(file_path):
                     os.unlink(file_path)
-                except Exception as e:
-                    print(f"Impossible de supprimer le fichier temporaire {file_path} : {e}")
+            except Exception as e:
+                print(f"Impossible de supprimer le fichier temporaire {file_path} : {e}")
 
     def closeEvent(self, event):
         event.ignore()
@@ -1023,7 +4150,22 @@ class MainWindow(QMainWindow):
         )
 
 def main():
+    parser = argparse.ArgumentParser(description="Dictée vocale")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="afficher la chronologie du démarrage puis quitter")
+    parser.add_argument('--batch', nargs='+', metavar='CHEMIN',
+                        help="transcrire sans interface des fichiers WAV/FLAC (fichiers, dossiers ou motifs glob)")
+    parser.add_argument('--jobs', type=int, default=4, help="fichiers traités en parallèle (--batch)")
+    parser.add_argument('--state', help="fichier d'état pour la reprise (--batch)")
+    parser.add_argument('--force', action='store_true', help="retranscrire les fichiers déjà traités (--batch)")
+    args, _ = parser.parse_known_args()
+    if args.batch:
+        sys.exit(run_batch(args))
+
+    STARTUP.mark('imports')
+    threading.Thread(target=preload_modules, daemon=True).start()
     app = QApplication(sys.argv)
+    STARTUP.mark('qapplication')
     
     # Définir la police globale
     font = QFont("Segoe UI", 10)
@@ -1035,7 +4177,18 @@ def main():
     # Créer et afficher la fenêtre principale
     main_window = MainWindow()
     main_window.show()
-    
+    STARTUP.mark('main_window')
+
+    if args.startup_report:
+        # Mesure de contrôle avant livraison : afficher le rapport puis quitter
+        def report_when_complete():
+            if STARTUP.complete:
+                print(STARTUP.format())
+                app.exit(0 if STARTUP.within_budget else 1)
+        report_timer = QTimer()
+        report_timer.timeout.connect(report_when_complete)
+        report_timer.start(50)
+
     sys.exit(app.exec_())
 
 if __name__ == '__main__':